@@ -0,0 +1,150 @@
+"""
+The background behind everything in the Universe: the grid, and a parallax starfield.
+
+Every layer is periodic, so it only needs a single pre-rendered tile per zoom-bucket,
+which is blitted wherever it intersects the screen.
+"""
+
+import math
+import random
+from collections import OrderedDict
+import pygame
+from pygame import Color
+from camera import Camera
+from config import GRID_SIZE, GRID_COLOR
+from profiler import profiler
+
+ZOOM_STEPS_PER_OCTAVE = 16  # Zoom-buckets are at most ~2.2% apart
+MIN_GRID_TILE_SIZE = 256  # in pixels, smaller tiles would need too many blits
+MIN_GRID_SPACING = 30  # in pixels, see GridLayer.get_spacing
+STAR_TILE_SIZE = 512  # The starfield's period, in layer-units
+
+
+class GridLayer:
+    """Lines every GRID_SIZE worldspace-units (or a multiple), moving with the world."""
+
+    parallax = 1.0
+
+    def get_zoom(self, camera_zoom: float) -> float:
+        return camera_zoom
+
+    def get_spacing(self, zoom: float) -> float:
+        # When zoomed out, only every second (fourth, ...) line is drawn. Denser lines
+        # would be a green mush anyway, and make the tiles slow to blit.
+        lines = 2 ** max(0, math.ceil(math.log2(MIN_GRID_SPACING / (GRID_SIZE * zoom))))
+        return lines * GRID_SIZE
+
+    def get_period(self, zoom: float) -> float:
+        # A power-of-two number of cells per tile, so tiles aren't tiny when zoomed out
+        spacing = self.get_spacing(zoom)
+        cells = 2 ** max(0, math.ceil(math.log2(MIN_GRID_TILE_SIZE / (spacing * zoom))))
+        return cells * spacing
+
+    def render_tile(self, zoom: float, period: float) -> pygame.Surface:
+        size = max(1, round(period * zoom))
+        tile = pygame.Surface((size, size))
+        spacing = self.get_spacing(zoom)
+        for i in range(round(period / spacing)):
+            offset = round(i * spacing * zoom)
+            pygame.draw.line(tile, GRID_COLOR, (offset, 0), (offset, size - 1))
+            pygame.draw.line(tile, GRID_COLOR, (0, offset), (size - 1, offset))
+        return tile
+
+
+class StarLayer:
+    """Randomly scattered stars, far away behind the world."""
+
+    def __init__(
+        self, parallax: float, star_count: int, color: Color, radius: int, seed: int
+    ):
+        """
+        Args:
+            parallax (float): How fast the layer moves along with the world, 0 being
+            infinitely far away and 1 being as close as the world itself.
+        """
+        self.parallax = parallax
+        self.color = color
+        self.radius = radius
+        rng = random.Random(seed)
+        self.stars = [
+            (rng.uniform(0, STAR_TILE_SIZE), rng.uniform(0, STAR_TILE_SIZE))
+            for _ in range(star_count)
+        ]
+
+    def get_zoom(self, camera_zoom: float) -> float:
+        # Far-away layers zoom less, and never so far that their tiles get huge or tiny
+        return min(1.0, max(0.5, camera_zoom**self.parallax))
+
+    def get_period(self, zoom: float) -> float:
+        return STAR_TILE_SIZE
+
+    def render_tile(self, zoom: float, period: float) -> pygame.Surface:
+        size = max(1, round(period * zoom))
+        tile = pygame.Surface((size, size))
+        for x, y in self.stars:
+            pygame.draw.circle(tile, self.color, (x * zoom, y * zoom), self.radius)
+        return tile
+
+
+class Background:
+    """
+    The grid and starfield, drawn from tiles pre-rendered per layer and zoom-bucket.
+
+    Tiles are placed at the exact zoom, but drawn at the zoom of their bucket, so
+    they might overlap or leave gaps of a few pixels. Black is transparent, so that's
+    not visible. Beyond `capacity`, the least recently used tile is dropped.
+    """
+
+    def __init__(self, capacity: int = 24):
+        self.capacity = capacity
+        self.layers: list[GridLayer | StarLayer] = [
+            StarLayer(0.1, 40, Color(90, 90, 110), 1, seed=1),
+            StarLayer(0.25, 25, Color(150, 150, 170), 1, seed=2),
+            StarLayer(0.5, 12, Color(220, 220, 240), 2, seed=3),
+            GridLayer(),
+        ]
+        self._tiles: OrderedDict[tuple[int, int], pygame.Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def _get_tile(
+        self, layer_index: int, zoom_bucket: int, zoom: float, period: float
+    ) -> pygame.Surface:
+        key = (layer_index, zoom_bucket)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        profiler.count("background tiles rendered")
+        tile = self.layers[layer_index].render_tile(zoom, period)
+        tile.set_colorkey(Color("black"), pygame.RLEACCEL)
+        self._tiles[key] = tile
+        if len(self._tiles) > self.capacity:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def draw(self, camera: Camera):
+        width, height = camera.surface.get_size()
+        for i, layer in enumerate(self.layers):
+            exact_zoom = layer.get_zoom(camera.zoom)
+            zoom_bucket = round(math.log2(exact_zoom) * ZOOM_STEPS_PER_OCTAVE)
+            zoom = 2 ** (zoom_bucket / ZOOM_STEPS_PER_OCTAVE)
+            period = layer.get_period(zoom)
+            tile = self._get_tile(i, zoom_bucket, zoom, period)
+
+            # The layer-space point at the center of the screen
+            center_x, center_y = layer.parallax * camera.pos
+            half_width, half_height = width / 2 / exact_zoom, height / 2 / exact_zoom
+            for tile_y in range(
+                math.floor((center_y - half_height) / period),
+                math.floor((center_y + half_height) / period) + 1,
+            ):
+                y = (tile_y * period - center_y) * exact_zoom + height / 2
+                for tile_x in range(
+                    math.floor((center_x - half_width) / period),
+                    math.floor((center_x + half_width) / period) + 1,
+                ):
+                    x = (tile_x * period - center_x) * exact_zoom + width / 2
+                    camera.draw_surface(tile, (round(x), round(y)))
@@ -0,0 +1,238 @@
+"""
+Benchmarks how Universe.step and Universe.draw scale.
+
+Every scenario is the default map (see scenario.py) with more entities, simulated
+for a number of ticks and drawn to an offscreen Surface. Besides the total time of
+`step` and `draw` ("frame/simulate" and "frame/draw", as in main.py), the time of
+each phase is read from the profiler scopes they emit. Results can be saved as
+JSON and compared against a stored baseline.
+
+Example:
+    py benchmark.py --save-baseline
+    py benchmark.py --compare benchmark_baseline.json --threshold 0.2
+"""
+
+import os
+
+# Never open a window, drawing goes to an offscreen Surface
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import random
+import sys
+import pygame
+from pygame.math import Vector2
+from camera import Camera
+from config import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    WORLD_WIDTH,
+    WORLD_HEIGHT,
+    TICK_RATE,
+    INTEGRATOR,
+)
+from physics import INTEGRATORS
+from profiler import profiler
+from scenario import build_universe
+from universe import Universe
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Phase timings below this many milliseconds are too noisy to compare
+MIN_COMPARED_MS = 0.02
+
+# Entity counts on top of the default map's 10 planets
+SCENARIOS: dict[str, dict[str, int]] = {
+    "default": dict(asteroids=5, enemies=16, projectiles=0, extra_planets=0),
+    "asteroids-1k": dict(asteroids=1000, enemies=16, projectiles=0, extra_planets=0),
+    "swarm-400": dict(asteroids=50, enemies=400, projectiles=0, extra_planets=0),
+    "swarm-1k": dict(asteroids=50, enemies=1000, projectiles=0, extra_planets=0),
+    "projectiles-2k": dict(asteroids=50, enemies=50, projectiles=2000, extra_planets=0),
+    "planets-100": dict(asteroids=50, enemies=16, projectiles=0, extra_planets=90),
+}
+
+
+def build_scenario(
+    asteroids: int,
+    enemies: int,
+    projectiles: int,
+    extra_planets: int,
+    seed: int = 0,
+    gravity_field: bool = False,
+    integrator: str = INTEGRATOR,
+    sector_lod: bool = False,
+) -> Universe:
+    """
+    Builds the default map with the given entity counts, and fires `projectiles`
+    projectiles from random positions.
+    """
+    universe = build_universe(
+        asteroid_count=asteroids,
+        enemy_count=enemies,
+        seed=seed,
+        gravity_field=gravity_field,
+        integrator=integrator,
+        sector_lod=sector_lod,
+        extra_planet_count=extra_planets,
+    )
+
+    rng = random.Random(seed)
+    shooters = [universe.player_ship, *universe.enemy_ships]
+    for i in range(projectiles):
+        shooter = shooters[i % len(shooters)]
+        pos = Vector2(rng.uniform(0, WORLD_WIDTH), rng.uniform(0, WORLD_HEIGHT))
+        vel = Vector2(rng.uniform(-500, 500), rng.uniform(-500, 500))
+        universe.projectiles.spawn(pos, vel, shooter.projectile_color, shooter.owner_id)
+    return universe
+
+
+def benchmark_scenario(
+    params: dict[str, int],
+    ticks: int,
+    repeats: int,
+    draw: bool = True,
+    gravity_field: bool = False,
+    integrator: str = INTEGRATOR,
+    tick_rate: float = TICK_RATE,
+    sector_lod: bool = False,
+) -> dict[str, float]:
+    """
+    Returns the mean time per tick of every profiler scope (e.g. "frame/simulate" or
+    "step/gravity"), in milliseconds.
+    Of all repeats (each on a fresh Universe), the fastest is taken.
+    """
+    dt = 1 / tick_rate
+    best: dict[str, float] = {}
+    for repeat in range(repeats):
+        universe = build_scenario(
+            **params,
+            seed=repeat,
+            gravity_field=gravity_field,
+            integrator=integrator,
+            sector_lod=sector_lod,
+        )
+        camera = Camera(
+            Vector2(universe.player_ship.pos),
+            1.0,
+            pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)),
+        )
+        # The profiler overlay isn't drawn in a normal game, so don't time it
+        universe.show_profiler = False
+
+        # Average over all ticks of this repeat
+        profiler.average_frames = ticks
+        profiler.set_enabled(True)
+        for _ in range(ticks):
+            with profiler.scope("frame/simulate"):
+                universe.step(dt)
+            if draw:
+                with profiler.scope("frame/draw"):
+                    camera.pos = universe.player_ship.pos
+                    camera.start_drawing_new_frame()
+                    universe.draw(camera)
+            profiler.end_frame()
+        averages = profiler.get_averages()
+        profiler.set_enabled(False)
+
+        for name, ms in averages.items():
+            # Names without a "/" are counters
+            if "/" in name:
+                best[name] = min(best.get(name, ms), ms)
+    return best
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Returns a description of every phase that got slower than `1 + threshold` times baseline."""
+    regressions = []
+    for scenario, phases in results.items():
+        for phase, ms in phases.items():
+            base_ms = baseline.get(scenario, {}).get(phase)
+            if base_ms is None or base_ms < MIN_COMPARED_MS:
+                continue
+            if ms > (1 + threshold) * base_ms:
+                regressions.append(
+                    f"{scenario}/{phase}: {ms:.3f} ms vs. {base_ms:.3f} ms baseline"
+                    f" (+{100 * (ms / base_ms - 1):.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Only run these scenarios (may be given multiple times)",
+    )
+    parser.add_argument("--ticks", type=int, default=120)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-draw", action="store_true", help="Don't time drawing")
+    parser.add_argument(
+        "--gravity-field",
+        action="store_true",
+        help="Interpolate gravity from a precomputed field",
+    )
+    parser.add_argument("--integrator", choices=INTEGRATORS, default=INTEGRATOR)
+    parser.add_argument("--tick-rate", type=float, default=TICK_RATE)
+    parser.add_argument(
+        "--sector-lod",
+        action="store_true",
+        help="Simulate bodies far from the player less often",
+    )
+    parser.add_argument("--output", metavar="FILE", help="Save results as JSON")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"Save results as the new baseline ({DEFAULT_BASELINE})",
+    )
+    parser.add_argument(
+        "--compare", metavar="FILE", help="Compare results against this baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown counted as a regression (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    pygame.init()
+    results: dict[str, dict[str, float]] = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = benchmark_scenario(
+            SCENARIOS[name],
+            args.ticks,
+            args.repeats,
+            not args.no_draw,
+            args.gravity_field,
+            args.integrator,
+            args.tick_rate,
+            args.sector_lod,
+        )
+        timings = ", ".join(f"{phase} {ms:.3f}" for phase, ms in results[name].items())
+        print(f"{name} (ms per tick): {timings}")
+
+    for path in [args.output, DEFAULT_BASELINE if args.save_baseline else None]:
+        if path is not None:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {100 * args.threshold:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmarks the Barnes-Hut gravity solver against direct summation.
+
+For every body count, bodies are scattered over the world (uniformly, or in clusters),
+and the tree's build- and traversal-time and its error relative to the exact
+accelerations are reported. For large counts, the exact accelerations are only
+computed for a random sample of bodies, and the direct summation's time for all of
+them is extrapolated from that.
+
+Example:
+    py benchmark_nbody.py
+    py benchmark_nbody.py --bodies 1000 --bodies 50000 --theta 0.3 --clustered
+"""
+
+import argparse
+import time
+import numpy as np
+from config import WORLD_WIDTH, WORLD_HEIGHT, BARNES_HUT_THETA
+from physics import BarnesHutTree, direct_gravitational_acceleration, disk_mass
+
+DEFAULT_BODIES = [1000, 5000, 10000, 50000]
+
+# Above this many bodies, the exact accelerations are computed for a sample only
+MAX_DIRECT_BODIES = 5000
+
+
+def random_bodies(
+    n: int, clustered: bool, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns positions (shape (n, 2)) and masses (shape (n,)) of random asteroids."""
+    size = np.array([WORLD_WIDTH, WORLD_HEIGHT])
+    if clustered:
+        centers = rng.uniform(0, 1, (8, 2)) * size
+        pos = centers[rng.integers(0, len(centers), n)]
+        pos += rng.normal(0, 0.03 * size.min(), (n, 2))
+    else:
+        pos = rng.uniform(0, 1, (n, 2)) * size
+    radius = rng.uniform(40, 120, n)
+    return pos, disk_mass(radius)  # Like the Asteroids in the game
+
+
+def benchmark_bodies(
+    n: int, theta: float, clustered: bool, repeats: int, seed: int = 0
+) -> dict[str, float]:
+    """
+    Returns the times (fastest of all repeats) in milliseconds, and the median and
+    99th percentile of the error of each body's acceleration, relative to its size.
+    """
+    rng = np.random.default_rng(seed)
+    pos, mass = random_bodies(n, clustered, rng)
+
+    build_ms = walk_ms = direct_ms = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tree = BarnesHutTree(pos, mass)
+        built = time.perf_counter()
+        acceleration = tree.acceleration(theta)
+        walked = time.perf_counter()
+        build_ms = min(build_ms, 1000 * (built - start))
+        walk_ms = min(walk_ms, 1000 * (walked - built))
+
+    sample = None
+    if n > MAX_DIRECT_BODIES:
+        sample = rng.choice(n, MAX_DIRECT_BODIES, replace=False)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        exact = direct_gravitational_acceleration(pos, mass, sample)
+        direct_ms = min(direct_ms, 1000 * (time.perf_counter() - start))
+    if sample is not None:
+        direct_ms *= n / len(sample)
+        acceleration = acceleration[sample]
+
+    error = np.linalg.norm(acceleration - exact, axis=1)
+    error /= np.linalg.norm(exact, axis=1)
+    return {
+        "build": build_ms,
+        "walk": walk_ms,
+        "tree": build_ms + walk_ms,
+        "direct": direct_ms,
+        "median error": float(np.median(error)),
+        "p99 error": float(np.quantile(error, 0.99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--bodies",
+        type=int,
+        action="append",
+        help=f"Number of bodies (may be given multiple times, default: {DEFAULT_BODIES})",
+    )
+    parser.add_argument(
+        "--theta",
+        type=float,
+        default=BARNES_HUT_THETA,
+        help=f"Opening angle (default: {BARNES_HUT_THETA})",
+    )
+    parser.add_argument(
+        "--clustered", action="store_true", help="Scatter bodies in a few clusters"
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"theta {args.theta}, {'clustered' if args.clustered else 'uniform'} bodies")
+    for n in args.bodies or DEFAULT_BODIES:
+        result = benchmark_bodies(n, args.theta, args.clustered, args.repeats)
+        # Direct summation's time is extrapolated from a sample for large n
+        approximate = "~" if n > MAX_DIRECT_BODIES else ""
+        print(
+            f"{n:>6} bodies: tree {result['tree']:.1f} ms"
+            f" (build {result['build']:.1f}, walk {result['walk']:.1f}),"
+            f" direct {approximate}{result['direct']:.1f} ms"
+            f" ({result['direct'] / result['tree']:.1f}x),"
+            f" error median {100 * result['median error']:.3f}%"
+            f" p99 {100 * result['p99 error']:.3f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
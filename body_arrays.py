@@ -0,0 +1,192 @@
+import itertools
+import numpy as np
+from pygame.math import Vector2
+from physics import PhysicalObject, GRAVITATIONAL_CONSTANT
+
+
+def gravitational_acceleration(
+    points: np.ndarray, sources_pos: np.ndarray, sources_mass: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the acceleration at every point (shape (n, 2)) due to the given sources.
+    Same model as PhysicalObject.gravitational_force, divided by the own mass.
+
+    Args:
+        sources_pos (np.ndarray): Shape (k, 2), positions of the attracting bodies.
+        sources_mass (np.ndarray): Shape (k,), masses of the attracting bodies.
+    """
+    if len(points) == 0 or len(sources_mass) == 0:
+        return np.zeros((len(points), 2))
+    delta = sources_pos[None, :, :] - points[:, None, :]  # point -> source
+    dist_squared = np.einsum("ijk,ijk->ij", delta, delta)
+    scale = (
+        GRAVITATIONAL_CONSTANT * sources_mass / (dist_squared * np.sqrt(dist_squared))
+    )
+    return np.einsum("ij,ijk->ik", scale, delta)
+
+
+class BodyArrays:
+    """
+    Structure-of-arrays storage for dynamic PhysicalObjects.
+
+    Position, velocity, accumulated force and mass of every added object live
+    in contiguous NumPy arrays, so that gravity, thrust and integration can be
+    computed for all objects at once. The objects themselves become thin views
+    over their row (see `PhysicalObject.pos`, `PhysicalObject.vel`).
+
+    Rows are kept dense: `self.pos[: self.count]` are exactly the live bodies,
+    and removing an object moves the last row into the freed slot.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        # Positions before the last step, for render interpolation
+        self.prev_pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.force = np.zeros((capacity, 2))
+        self.mass = np.ones(capacity)
+        # Simulated time each body is behind, and how long it's been idle for,
+        # see sectors.SectorLod
+        self.lag = np.zeros(capacity)
+        self.idle_time = np.zeros(capacity)
+        self.objects: list[PhysicalObject] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self):
+        capacity = 2 * len(self.mass)
+        for name in ["pos", "prev_pos", "vel", "force", "mass", "lag", "idle_time"]:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self.count] = old[: self.count]
+            setattr(self, name, new)
+        self.mass[self.count :] = 1
+
+    def add(self, pobj: PhysicalObject):
+        """Move `pobj`'s state into a new row and bind `pobj` to it."""
+        if pobj.arrays is not None:
+            raise ValueError("PhysicalObject is already bound to some BodyArrays")
+        if self.count == len(self.mass):
+            self._grow()
+
+        row = self.count
+        self.pos[row] = (pobj.pos.x, pobj.pos.y)
+        self.prev_pos[row] = self.pos[row]
+        self.vel[row] = (pobj.vel.x, pobj.vel.y)
+        self.force[row] = 0
+        self.mass[row] = pobj.mass
+        self.lag[row] = 0
+        self.idle_time[row] = 0
+        self.objects.append(pobj)
+        self.count += 1
+
+        pobj.arrays = self
+        pobj.row = row
+
+    def add_many(self, pobjs: list[PhysicalObject]):
+        """Like calling `add` on each of `pobjs`, but much faster for many objects."""
+        if any(pobj.arrays is not None for pobj in pobjs):
+            raise ValueError("PhysicalObject is already bound to some BodyArrays")
+        n = len(pobjs)
+        if n == 0:
+            return
+        while self.count + n > len(self.mass):
+            self._grow()
+
+        rows = slice(self.count, self.count + n)
+        # Much faster than converting a list of tuples
+        self.pos[rows] = np.fromiter(
+            itertools.chain.from_iterable(pobj.pos for pobj in pobjs), float, 2 * n
+        ).reshape(n, 2)
+        self.prev_pos[rows] = self.pos[rows]
+        self.vel[rows] = np.fromiter(
+            itertools.chain.from_iterable(pobj.vel for pobj in pobjs), float, 2 * n
+        ).reshape(n, 2)
+        self.force[rows] = 0
+        self.mass[rows] = [pobj.mass for pobj in pobjs]
+        self.lag[rows] = 0
+        self.idle_time[rows] = 0
+        self.objects.extend(pobjs)
+        for row, pobj in enumerate(pobjs, self.count):
+            pobj.arrays = self
+            pobj.row = row
+        self.count += n
+
+    def remove(self, pobj: PhysicalObject):
+        """Unbind `pobj`, handing its current state back to the object."""
+        if pobj.arrays is not self:
+            raise ValueError("PhysicalObject is not bound to these BodyArrays")
+        row = pobj.row
+        pos, vel = pobj.pos, pobj.vel
+        pobj.arrays = None
+        pobj.row = -1
+        pobj.pos, pobj.vel = pos, vel
+
+        # Keep rows dense by moving the last row into the hole
+        last = self.count - 1
+        if row != last:
+            for array in [
+                self.pos,
+                self.prev_pos,
+                self.vel,
+                self.force,
+                self.mass,
+                self.lag,
+                self.idle_time,
+            ]:
+                array[row] = array[last]
+            moved = self.objects[last]
+            self.objects[row] = moved
+            moved.row = row
+        self.objects.pop()
+        self.count -= 1
+
+    def save_previous(self):
+        self.prev_pos[: self.count] = self.pos[: self.count]
+
+    def interpolate(self, alpha: float) -> np.ndarray:
+        """
+        Moves every body to `alpha` of the way from its previous to its current position.
+        Returns the current positions, to be restored with `restore_positions`.
+        """
+        n = self.count
+        current = self.pos[:n].copy()
+        self.pos[:n] = self.prev_pos[:n] + alpha * (current - self.prev_pos[:n])
+        return current
+
+    def restore_positions(self, current: np.ndarray):
+        self.pos[: len(current)] = current
+
+    def apply_forces(self, dt: float):
+        """Apply accumulated forces to the velocities."""
+        n = self.count
+        self.vel[:n] += self.force[:n] * (dt / self.mass[:n, None])
+        self.force[:n] = 0
+
+    def integrate(self, dt: float):
+        """Apply accumulated forces to the velocities, then move all bodies."""
+        self.apply_forces(dt)
+        self.pos[: self.count] += dt * self.vel[: self.count]
+
+    def gravitational_acceleration(
+        self, sources_pos: np.ndarray, sources_mass: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns the acceleration every body experiences due to the given (stationary) sources.
+
+        Args:
+            sources_pos (np.ndarray): Shape (k, 2), positions of the attracting bodies.
+            sources_mass (np.ndarray): Shape (k,), masses of the attracting bodies.
+        """
+        return gravitational_acceleration(
+            self.pos[: self.count], sources_pos, sources_mass
+        )
+
+    def apply_gravity(
+        self, sources_pos: np.ndarray, sources_mass: np.ndarray, dt: float
+    ):
+        self.vel[: self.count] += dt * self.gravitational_acceleration(
+            sources_pos, sources_mass
+        )
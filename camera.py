@@ -1,7 +1,13 @@
+import math
+import numpy as np
 import pygame
 import pygame.gfxdraw
 from pygame.math import Vector2
 from pygame import Color
+from profiler import profiler
+
+# How far (in pixels) Camera.draw_clipped_circle may stray from the true circle
+CLIPPED_CIRCLE_TOLERANCE = 0.5
 
 
 class Camera:
@@ -105,23 +111,49 @@ class Camera:
         """Determines whether the rectangle intersects screen.
         Assumes that top_left.x <= bottom_right.x and top_left.y <= bottom_right.y.
         """
-        (width, height) = self.surface.get_size()
-        own_top_left = Vector2(0, 0)
-        own_bottom_right = Vector2(width, height)
-        return all(
-            [
-                own_top_left.x <= bottom_right.x,
-                top_left.x <= own_bottom_right.x,
-                own_top_left.y <= bottom_right.y,
-                top_left.y <= own_bottom_right.y,
-            ]
+        return self._box_intersects_screen(
+            top_left.x, top_left.y, bottom_right.x, bottom_right.y
         )
 
+    def _box_intersects_screen(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> bool:
+        width, height = self.surface.get_size()
+        return 0 <= max_x and min_x <= width and 0 <= max_y and min_y <= height
+
     def world_to_camera(self, vec: Vector2) -> Vector2:
         """Transforms a worldspace-vector to its position on the camera's screen."""
         width, height = self.surface.get_size()
-        center = Vector2(width / 2, height / 2)
-        return (vec - self.pos) * self.zoom + center
+        return Vector2(
+            (vec.x - self.pos.x) * self.zoom + width / 2,
+            (vec.y - self.pos.y) * self.zoom + height / 2,
+        )
+
+    def world_to_camera_array(self, points: np.ndarray) -> np.ndarray:
+        """Like `world_to_camera`, for an array of points (of shape (..., 2))."""
+        width, height = self.surface.get_size()
+        return (points - (self.pos.x, self.pos.y)) * self.zoom + (width / 2, height / 2)
+
+    def _visible_boxes(self, box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+        """
+        Returns the indices of the worldspace-boxes (given by their (n, 2)-arrays of
+        minimal and maximal corners) that intersect the visible area.
+        """
+        top_left, bottom_right = self.get_world_rect()
+        visible = np.flatnonzero(
+            (top_left.x <= box_max[:, 0])
+            & (box_min[:, 0] <= bottom_right.x)
+            & (top_left.y <= box_max[:, 1])
+            & (box_min[:, 1] <= bottom_right.y)
+        )
+        profiler.count("culled shapes", len(box_min) - len(visible))
+        return visible
+
+    def get_world_rect(self) -> tuple[Vector2, Vector2]:
+        """Returns top-left and bottom-right worldspace-coordinate of the area visible on screen."""
+        width, height = self.surface.get_size()
+        half_extent = Vector2(width / 2, height / 2) / self.zoom
+        return (self.pos - half_extent, self.pos + half_extent)
 
     def start_drawing_new_frame(self):
         self.surface.fill(Color("black"))
@@ -132,12 +164,12 @@ class Camera:
         x, y, r = int(ccenter.x), int(ccenter.y), int(cradius)
 
         # soft check for circle-screen-intersection:
-        offset = Vector2(r, r)
-        icenter = Vector2(x, y)
-        tl, br = icenter - offset, icenter + offset
-        if self._rectangle_intersects_screen(tl, br):
+        if self._box_intersects_screen(x - r, y - r, x + r, y + r):
             pygame.gfxdraw.aacircle(self.surface, x, y, r, color)
             pygame.gfxdraw.filled_circle(self.surface, x, y, r, color)
+            profiler.count("draw calls", 2)
+        else:
+            profiler.count("culled shapes")
 
     def draw_polygon(self, color: Color, points: list[Vector2]):
         # Soft check for points-screen-intersection:
@@ -148,6 +180,161 @@ class Camera:
         if self._rectangle_intersects_screen(enclosing_tl, enclosing_br):
             pygame.gfxdraw.aapolygon(self.surface, cpoints, color)
             pygame.gfxdraw.filled_polygon(self.surface, cpoints, color)
+            profiler.count("draw calls", 2)
+        else:
+            profiler.count("culled shapes")
+
+    def visible_circles(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Returns the indices of the worldspace-circles that are (possibly) visible."""
+        r = radii[:, None]
+        return self._visible_boxes(centers - r, centers + r)
+
+    def draw_clipped_circle(self, color: Color, center: Vector2, radius: float):
+        """
+        Draws only the on-screen part of a circle, as a single polygon.
+
+        Meant for circles much larger than the screen: unlike draw_circle, nothing
+        off-screen is filled, and there's no limit on the radius. The polygon's edges
+        are at most CLIPPED_CIRCLE_TOLERANCE pixels away from the circle's edge.
+        """
+        cx, cy = self.world_to_camera(center)
+        cradius = radius * self.zoom
+        width, height = self.surface.get_size()
+        top, bottom = max(0.0, cy - cradius), min(float(height), cy + cradius)
+        if top >= bottom or cx + cradius < 0 or cx - cradius > width:
+            profiler.count("culled shapes")
+            return
+
+        # Rows at evenly spaced angles on the circle, so that the chords between them
+        # stay within the tolerance. Only the rows between `top` and `bottom` are kept.
+        angle_step = 2 * math.acos(max(-1.0, 1 - CLIPPED_CIRCLE_TOLERANCE / cradius))
+        first_angle = math.asin(max(-1.0, (top - cy) / cradius))
+        last_angle = math.asin(min(1.0, (bottom - cy) / cradius))
+        angles = np.arange(
+            math.ceil(first_angle / angle_step), math.floor(last_angle / angle_step) + 1
+        )
+        rows = [top, bottom, *(cy + cradius * np.sin(angles * angle_step))]
+        # Also the rows where the circle's edge leaves the screen sideways, else thin
+        # slivers of a circle could fall between two rows
+        for x in [0, width]:
+            if abs(cx - x) < cradius:
+                half_height = math.sqrt(cradius**2 - (cx - x) ** 2)
+                rows += [cy - half_height, cy + half_height]
+        rows = np.unique(np.clip(rows, top, bottom))
+
+        half_widths = np.sqrt(np.maximum(0, cradius**2 - (rows - cy) ** 2))
+        lefts, rights = cx - half_widths, cx + half_widths
+        # The on-screen part is convex, so these rows are contiguous
+        on_screen = (rights >= 0) & (lefts <= width)
+        if on_screen.sum() < 2:
+            profiler.count("culled shapes")
+            return
+        rows = rows[on_screen]
+        lefts = np.clip(lefts[on_screen], 0, width)
+        rights = np.clip(rights[on_screen], 0, width)
+
+        points = np.concatenate(
+            [
+                np.stack([lefts, rows], axis=1),
+                np.stack([rights, rows], axis=1)[::-1],
+            ]
+        ).tolist()
+        pygame.gfxdraw.aapolygon(self.surface, points, color)
+        pygame.draw.polygon(self.surface, color, points)
+        profiler.count("draw calls", 2)
+
+    def draw_circles(
+        self, colors: Color | list[Color], centers: np.ndarray, radii: np.ndarray
+    ):
+        """
+        Draws many circles at once, culling them in worldspace before transforming.
+
+        Args:
+            colors (Color | list[Color]): One color for all circles, or one per circle.
+            centers (np.ndarray): Shape (n, 2), worldspace-centers.
+            radii (np.ndarray): Shape (n,), worldspace-radii.
+        """
+        visible = self.visible_circles(centers, radii)
+        ccenters = self.world_to_camera_array(centers[visible]).astype(int)
+        cradii = (radii[visible] * self.zoom).astype(int)
+        for i, (x, y), r in zip(visible.tolist(), ccenters.tolist(), cradii.tolist()):
+            color = colors if isinstance(colors, Color) else colors[i]
+            pygame.gfxdraw.aacircle(self.surface, x, y, r, color)
+            pygame.gfxdraw.filled_circle(self.surface, x, y, r, color)
+        profiler.count("draw calls", 2 * len(visible))
+
+    def draw_polygons(self, colors: Color | list[Color], polygons: np.ndarray):
+        """
+        Draws many polygons with the same number of points at once,
+        culling them in worldspace before transforming.
+
+        Args:
+            colors (Color | list[Color]): One color for all polygons, or one per polygon.
+            polygons (np.ndarray): Shape (n, k, 2), the k worldspace-points of n polygons.
+        """
+        visible = self._visible_boxes(polygons.min(axis=1), polygons.max(axis=1))
+        cpolygons = self.world_to_camera_array(polygons[visible])
+        for i, cpoints in zip(visible.tolist(), cpolygons.tolist()):
+            color = colors if isinstance(colors, Color) else colors[i]
+            pygame.gfxdraw.aapolygon(self.surface, cpoints, color)
+            pygame.gfxdraw.filled_polygon(self.surface, cpoints, color)
+        profiler.count("draw calls", 2 * len(visible))
+
+    def draw_lines(
+        self,
+        colors: Color | list[Color],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        width: float,
+    ):
+        """Like `draw_line`, for (n, 2)-arrays of start- and end-points."""
+        delta = ends - starts
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        nonzero = length > 0
+        if not isinstance(colors, Color):
+            colors = [c for c, keep in zip(colors, nonzero) if keep]
+        delta, length = delta[nonzero], length[nonzero]
+        starts, ends = starts[nonzero], ends[nonzero]
+        orthogonal = np.stack([-delta[:, 1], delta[:, 0]], axis=1)
+        orthogonal *= (width / 2 / length)[:, None]
+        self.draw_polygons(
+            colors,
+            np.stack(
+                [
+                    starts + orthogonal,
+                    ends + orthogonal,
+                    ends - orthogonal,
+                    starts - orthogonal,
+                ],
+                axis=1,
+            ),
+        )
+
+    def draw_polyline(self, color: Color, points: np.ndarray, width: int = 1):
+        """
+        Draws lines between consecutive worldspace-points (an (n, 2)-array), with a
+        screenspace `width`. Runs of visible segments are drawn in one call each.
+        """
+        if len(points) < 2:
+            return
+        visible = self._visible_boxes(
+            np.minimum(points[:-1], points[1:]), np.maximum(points[:-1], points[1:])
+        )
+        if len(visible) == 0:
+            return
+        cpoints = self.world_to_camera_array(points)
+        runs = np.split(visible, np.flatnonzero(np.diff(visible) > 1) + 1)
+        for run in runs:
+            run_points = cpoints[run[0] : run[-1] + 2].tolist()
+            pygame.draw.lines(self.surface, color, False, run_points, width)
+        profiler.count("draw calls", len(runs))
+
+    def draw_marker(self, color: Color, center: Vector2, size: float):
+        """Draws an X, `size` pixels from the center to each corner."""
+        ccenter = self.world_to_camera(center)
+        for corner in [Vector2(size, size), Vector2(size, -size)]:
+            pygame.draw.line(self.surface, color, ccenter - corner, ccenter + corner, 2)
+        profiler.count("draw calls", 2)
 
     def draw_line(self, color: Color, start: Vector2, end: Vector2, width: float):
         delta = end - start
@@ -171,6 +358,25 @@ class Camera:
             pygame.gfxdraw.box(
                 self.surface, (ttop_left, tbottom_right - ttop_left), color
             )
+            profiler.count("draw calls")
+        else:
+            profiler.count("culled shapes")
+
+    def draw_surface(self, surface: pygame.Surface, pos: Vector2):
+        """Draw `surface` with its top-left corner at screen-position `pos`."""
+        self.surface.blit(surface, pos)
+        profiler.count("draw calls")
+
+    def draw_sprite(self, sprite: pygame.Surface, center: Vector2):
+        """Draw `sprite` (already scaled to screen-size) centered at worldspace-position `center`."""
+        ccenter = self.world_to_camera(center)
+        half_size = Vector2(sprite.get_size()) / 2
+        tl, br = ccenter - half_size, ccenter + half_size
+        if self._rectangle_intersects_screen(tl, br):
+            self.surface.blit(sprite, (round(tl.x), round(tl.y)))
+            profiler.count("draw calls")
+        else:
+            profiler.count("culled shapes")
 
     def draw_text(
         self, text: str, pos: Vector2 | None, font: pygame.font.Font, color: Color
@@ -182,4 +388,5 @@ class Camera:
             pos = Vector2(
                 (width - rendered.get_width()) / 2, (height - rendered.get_height()) / 2
             )
-        self.surface.blit(rendered, pos)
\ No newline at end of file
+        self.surface.blit(rendered, pos)
+        profiler.count("draw calls")
@@ -0,0 +1,89 @@
+import numpy as np
+from pygame.math import Vector2
+from physics import disk_disk_toi
+from spatial_hash import DiskGrid
+
+
+class ProjectileHits:
+    """
+    Result of `find_projectile_hits`.
+    All projectile-indices refer to the arrays that were passed to it.
+    """
+
+    def __init__(
+        self, removed: np.ndarray, killed_enemies: np.ndarray, player_hits: int
+    ):
+        """
+        Args:
+            removed (np.ndarray): Sorted indices of projectiles that must be removed.
+            killed_enemies (np.ndarray): Sorted indices of enemy ships that were shot down.
+            player_hits (int): Number of enemy projectiles that hit the player ship.
+        """
+        self.removed = removed
+        self.killed_enemies = killed_enemies
+        self.player_hits = player_hits
+
+
+def find_projectile_hits(
+    prev_pos: np.ndarray,
+    pos: np.ndarray,
+    from_player: np.ndarray,
+    world_size: Vector2,
+    disk_grid: DiskGrid,
+    enemy_grid: DiskGrid,
+    player_prev_pos: Vector2,
+    player_pos: Vector2,
+    player_radius: float,
+) -> ProjectileHits:
+    """
+    Tests all projectiles at once against the world border, asteroids and planets, and ships.
+
+    Collisions are swept: every projectile moved in a straight line from `prev_pos` to
+    `pos` during the last step, and so did every disk, so fast projectiles can't
+    tunnel through thin ships. A projectile only hits whatever it touched first.
+
+    A projectile leaving the world or hitting an asteroid or planet is removed.
+    A projectile of the player hitting an enemy ship kills that ship (every ship is killed by
+    the earliest such projectile only, the others fly on). A projectile of an enemy
+    hitting the player ship counts towards `player_hits`.
+
+    Args:
+        prev_pos (np.ndarray): Shape (k, 2), positions of all projectiles before.
+        pos (np.ndarray): Shape (k, 2), positions of all projectiles.
+        from_player (np.ndarray): Shape (k,), whether each projectile was shot by the player.
+        disk_grid (DiskGrid): Built over all asteroids and planets.
+        enemy_grid (DiskGrid): Built over the enemy ships, in order.
+    """
+    x, y = pos[:, 0], pos[:, 1]
+    inside_world = (0 <= x) & (x <= world_size.x) & (0 <= y) & (y <= world_size.y)
+    hit_disk, disk_toi = disk_grid.first_swept_hit(prev_pos, pos)
+    removed = ~inside_world | (hit_disk >= 0)
+
+    # Player projectiles vs. enemy ships, unless they hit an asteroid or planet before
+    candidates = np.flatnonzero(from_player)
+    hit_enemy, enemy_toi = enemy_grid.first_swept_hit(
+        prev_pos[candidates], pos[candidates]
+    )
+    hitting = enemy_toi < disk_toi[candidates]
+    candidates, hit_enemy = candidates[hitting], hit_enemy[hitting]
+    # The earliest projectile hitting each enemy (ties: the lowest index) kills it
+    order = np.lexsort((enemy_toi[hitting], hit_enemy))
+    killed_enemies, first = np.unique(hit_enemy[order], return_index=True)
+    removed[candidates[order][first]] = True
+
+    # Enemy projectiles vs. player ship
+    candidates = np.flatnonzero(~from_player)
+    player_toi = disk_disk_toi(
+        prev_pos[candidates],
+        pos[candidates],
+        0,
+        np.array([[player_prev_pos.x, player_prev_pos.y]]),
+        np.array([[player_pos.x, player_pos.y]]),
+        player_radius,
+    )
+    hitting = player_toi < disk_toi[candidates]
+    removed[candidates[hitting]] = True
+
+    return ProjectileHits(
+        np.flatnonzero(removed), killed_enemies, int(np.count_nonzero(hitting))
+    )
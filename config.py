@@ -4,4 +4,25 @@ WORLD_WIDTH = 10000
 WORLD_HEIGHT = 10000
 GRID_SIZE = 300
 GRID_COLOR = (0, 70, 0)
+TICK_RATE = 120  # Simulation steps per second
+MAX_TICKS_PER_FRAME = 10  # Beyond this, the simulation slows down instead
+PROJECTILE_POOL_SIZE = 4096  # Maximum number of projectiles in flight
+PROJECTILE_LIFETIME = 10  # Seconds until a projectile expires
+MINIMAP_REFRESH_RATE = 10  # Times per second the minimap's markers are updated
+GRAVITY_FIELD_CELL_SIZE = 25  # Spacing of the precomputed gravity field's grid
+GRAVITY_FIELD_CACHE_DIR = "gravity_cache"  # Where precomputed gravity fields are kept
+BARNES_HUT_THETA = 0.5  # Opening angle of mutual gravity, 0 is exact but O(n²)
+INTEGRATOR = "euler"  # See physics.INTEGRATORS
+SUBSTEP_ACCURACY = 0.1  # Leapfrog substeps, relative to the local orbital timescale
+MAX_SUBSTEPS = 64  # Leapfrog substeps per tick, at most
+TRAJECTORY_HORIZON = 10  # Seconds the player ship's path is predicted ahead
+TRAJECTORY_STEP = 1 / 20  # Seconds between two predicted points
+TRAJECTORY_TOLERANCE = 5  # Drift from the predicted path that triggers recomputing it
+TRAJECTORY_STEPS_PER_FRAME = 25  # Predicted points computed per frame, at most
+SECTOR_SIZE = 1000  # Width and height of the sectors for the level of detail
+ACTIVE_SECTOR_RADIUS = 1  # Sectors this close to the player's are fully simulated
+DISTANT_STEP_INTERVAL = 8  # Ticks between two steps of bodies in distant sectors
+SLEEP_SPEED = 1  # Distant bodies slower than this (and not thrusting) are idle
+SLEEP_DELAY = 2  # Seconds a distant body must be idle before it falls asleep
+SLEEP_ACCELERATION = 0.01  # Bodies pulled harder than this by planets are never idle
 G = 0.0006  # Gravitational constant
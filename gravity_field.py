@@ -0,0 +1,174 @@
+"""
+A precomputed field of the planets' gravitational acceleration.
+
+Planets never move, so their acceleration at any point is a fixed function of position.
+It's sampled once on a grid over the world, and bilinearly interpolated from then on,
+which costs the same no matter how many planets there are. Close to planets, where
+the field is too steep to interpolate well, the exact sum is used instead.
+
+The grid is cached on disk, keyed by a hash of the planet layout and
+GRAVITATIONAL_CONSTANT, and memory-mapped when loaded.
+"""
+
+import hashlib
+import os
+import numpy as np
+from pygame.math import Vector2
+from body_arrays import gravitational_acceleration
+from config import GRAVITY_FIELD_CELL_SIZE, GRAVITY_FIELD_CACHE_DIR
+from physics import GRAVITATIONAL_CONSTANT
+from profiler import profiler
+
+# Increase when the file's contents change meaning, to ignore old cache-files
+FORMAT_VERSION = 1
+
+# Within this distance of a planet's surface, the exact sum is used.
+# Bilinear interpolation's relative error is roughly 0.75 * (cell_size / distance)**2
+# there, i.e. below 0.5% for the default cell size and planet sizes.
+EXACT_MARGIN = 100
+
+# Nodes are computed in chunks of this many rows, to bound memory with many planets
+_CHUNK_ROWS = 32
+
+
+class GravityField:
+    def __init__(
+        self,
+        table: np.ndarray,
+        cell_size: float,
+        planet_pos: np.ndarray,
+        planet_mass: np.ndarray,
+    ):
+        """
+        Use `GravityField.load_or_build` instead, unless you already have a table.
+
+        Args:
+            table (np.ndarray): Shape (nx, ny, 4, 2), see `GravityField.compute`.
+        """
+        self.cells = table.shape[:2]
+        # One row of 8 coefficients per cell. A plain ndarray (still backed by the
+        # memory-map, if any) is faster to index than a np.memmap.
+        self.table = np.asarray(table).reshape(-1, 8)
+        self.cell_size = cell_size
+        self.planet_pos = planet_pos
+        self.planet_mass = planet_mass
+
+    @staticmethod
+    def get_key(
+        planet_pos: np.ndarray,
+        planet_mass: np.ndarray,
+        planet_radius: np.ndarray,
+        size: Vector2,
+    ) -> str:
+        """A hash of everything the table depends on."""
+        key = hashlib.sha256()
+        key.update(np.array([FORMAT_VERSION, GRAVITATIONAL_CONSTANT]).tobytes())
+        key.update(np.array([size.x, size.y, GRAVITY_FIELD_CELL_SIZE]).tobytes())
+        for array in [planet_pos, planet_mass, planet_radius]:
+            key.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        return key.hexdigest()[:32]
+
+    @staticmethod
+    def compute(
+        planet_pos: np.ndarray,
+        planet_mass: np.ndarray,
+        planet_radius: np.ndarray,
+        size: Vector2,
+    ) -> np.ndarray:
+        """
+        Returns a table of shape (nx, ny, 4, 2), holding for every grid-cell the
+        coefficients c of its bilinear interpolation, i.e. the acceleration at
+        fraction (fx, fy) into the cell is c[0] + c[1] fx + c[2] fy + c[3] fx fy.
+        Cells where the exact sum must be used instead are NaN.
+        """
+        cell_size = GRAVITY_FIELD_CELL_SIZE
+        nx = int(np.ceil(size.x / cell_size))
+        ny = int(np.ceil(size.y / cell_size))
+        ys = np.arange(ny + 1) * cell_size
+
+        # The acceleration at every grid-node, node (i, j) being at (i, j) * cell_size
+        nodes = np.zeros((nx + 1, ny + 1, 2))
+        # Nodes at a planet's center divide by zero, but are never interpolated from
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for start in range(0, nx + 1, _CHUNK_ROWS):
+                xs = np.arange(start, min(nx + 1, start + _CHUNK_ROWS))
+                points = np.stack(
+                    np.broadcast_arrays(xs[:, None] * cell_size, ys[None, :]), axis=-1
+                ).reshape(-1, 2)
+                acceleration = gravitational_acceleration(
+                    points, planet_pos, planet_mass
+                )
+                nodes[xs] = acceleration.reshape(len(xs), ny + 1, 2)
+
+        a00, a10 = nodes[:-1, :-1], nodes[1:, :-1]
+        a01, a11 = nodes[:-1, 1:], nodes[1:, 1:]
+        table = np.stack([a00, a10 - a00, a01 - a00, a11 - a10 - a01 + a00], axis=2)
+
+        # A cell is close to a planet if its circumcircle is
+        xs = (np.arange(nx) + 0.5) * cell_size
+        ys = (np.arange(ny) + 0.5) * cell_size
+        half_diagonal = cell_size / np.sqrt(2)
+        for (x, y), radius in zip(planet_pos, planet_radius):
+            dist = np.hypot(xs[:, None] - x, ys[None, :] - y)
+            table[dist < radius + EXACT_MARGIN + half_diagonal] = np.nan
+        return table
+
+    @classmethod
+    def load_or_build(
+        cls,
+        planet_pos: np.ndarray,
+        planet_mass: np.ndarray,
+        planet_radius: np.ndarray,
+        size: Vector2,
+        cache_dir: str | None = GRAVITY_FIELD_CACHE_DIR,
+    ) -> "GravityField":
+        """
+        Memory-maps the table of these planets from `cache_dir`, computing and saving
+        it first if it isn't there. If `cache_dir` is None, nothing is saved.
+        """
+        if cache_dir is None:
+            table = cls.compute(planet_pos, planet_mass, planet_radius, size)
+        else:
+            key = cls.get_key(planet_pos, planet_mass, planet_radius, size)
+            path = os.path.join(cache_dir, f"gravity-{key}.npy")
+            if not os.path.exists(path):
+                os.makedirs(cache_dir, exist_ok=True)
+                # Write to a temporary file first, so that no half-written file is
+                # ever loaded (e.g. by another game launched at the same time)
+                temporary_path = f"{path}.{os.getpid()}.tmp"
+                with open(temporary_path, "wb") as file:
+                    np.save(
+                        file, cls.compute(planet_pos, planet_mass, planet_radius, size)
+                    )
+                os.replace(temporary_path, path)
+            table = np.load(path, mmap_mode="r")
+        return cls(table, GRAVITY_FIELD_CELL_SIZE, planet_pos, planet_mass)
+
+    def acceleration(self, points: np.ndarray) -> np.ndarray:
+        """Returns the acceleration at every point (shape (n, 2)) due to the planets."""
+        cell = points / self.cell_size
+        index = np.floor(cell).astype(np.intp)
+        i, j = index[:, 0], index[:, 1]
+        # Negative indices wrap around to huge ones
+        outside = i.view(np.uintp) >= self.cells[0]
+        outside |= j.view(np.uintp) >= self.cells[1]
+        flat_index = i * self.cells[1] + j
+        flat_index[outside] = 0
+
+        # Row-wise gathering and 1D arithmetic are much faster than the equivalent
+        # operations on (n, 4, 2)-arrays
+        c = np.take(self.table, flat_index, axis=0).T
+        fraction = cell - index
+        fx, fy = fraction[:, 0], fraction[:, 1]
+        fxy = fx * fy
+        acceleration = np.empty((len(points), 2))
+        acceleration[:, 0] = c[0] + c[2] * fx + c[4] * fy + c[6] * fxy
+        acceleration[:, 1] = c[1] + c[3] * fx + c[5] * fy + c[7] * fxy
+
+        exact = outside | np.isnan(acceleration[:, 0])
+        if exact.any():
+            profiler.count("exact gravity points", int(exact.sum()))
+            acceleration[exact] = gravitational_acceleration(
+                points[exact], self.planet_pos, self.planet_mass
+            )
+        return acceleration
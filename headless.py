@@ -0,0 +1,159 @@
+"""
+Runs the simulation without a window, as fast as the CPU allows.
+
+Example:
+    py headless.py --ticks 10000 --asteroids 500 --enemies 100 --seed 1
+"""
+
+import argparse
+import json
+import time
+from config import TICK_RATE, INTEGRATOR
+from physics import INTEGRATORS
+from scenario import build_universe
+from level import Level
+from universe import Universe
+from replay import Recording, play
+
+
+def run(
+    universe: Universe,
+    ticks: int,
+    dt: float = 1 / TICK_RATE,
+    player_fires: bool = False,
+) -> dict:
+    """
+    Steps `universe` `ticks` times without touching any display or Camera.
+    Returns end-state statistics, including the achieved ticks per second.
+    """
+    ship = universe.player_ship
+    game_over_tick: int | None = None
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if player_fires:
+            ship.shoot()
+        universe.step(dt)
+        if game_over_tick is None and (
+            not universe.contains_point(ship.pos) or ship.health <= 0
+        ):
+            game_over_tick = tick
+    elapsed = time.perf_counter() - start
+
+    stats = end_state_stats(universe)
+    stats.update(
+        {
+            "ticks": ticks,
+            "dt": dt,
+            "seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+            "game_over_tick": game_over_tick,
+        }
+    )
+    return stats
+
+
+def run_replay(recording: Recording) -> dict:
+    """Like `run`, but re-simulates `recording`."""
+    start = time.perf_counter()
+    universe = play(recording)
+    elapsed = time.perf_counter() - start
+
+    stats = end_state_stats(universe)
+    stats.update(
+        {
+            "ticks": recording.tick_count,
+            "seconds": elapsed,
+            "ticks_per_second": recording.tick_count / elapsed,
+        }
+    )
+    return stats
+
+
+def end_state_stats(universe: Universe) -> dict:
+    ship = universe.player_ship
+    return {
+        "player_pos": [ship.pos.x, ship.pos.y],
+        "player_vel": [ship.vel.x, ship.vel.y],
+        "player_health": ship.health,
+        "player_fuel": ship.fuel,
+        "player_ammo": ship.ammo,
+        "enemies_alive": len(universe.enemy_ships),
+        "asteroids": len(universe.asteroids),
+        "projectiles": universe.projectiles.count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--tick-rate", type=float, default=TICK_RATE)
+    parser.add_argument("--asteroids", type=int, default=5)
+    parser.add_argument("--enemies", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--level",
+        metavar="FILE",
+        help="Simulate a level (text or compiled) instead of the default map",
+    )
+    parser.add_argument(
+        "--object-physics",
+        action="store_true",
+        help="Use the per-object physics instead of the array backend",
+    )
+    parser.add_argument(
+        "--gravity-field",
+        action="store_true",
+        help="Interpolate gravity from a precomputed field",
+    )
+    parser.add_argument("--integrator", choices=INTEGRATORS, default=INTEGRATOR)
+    parser.add_argument(
+        "--sector-lod",
+        action="store_true",
+        help="Simulate bodies far from the player less often",
+    )
+    parser.add_argument(
+        "--player-fires", action="store_true", help="Keep the player gun firing"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Re-simulate a recording instead (ignores the scenario options)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print stats as JSON")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        stats = run_replay(Recording.load(args.replay))
+    elif args.level is not None:
+        universe = Level.load(args.level).build_universe(
+            array_physics=not args.object_physics,
+            seed=args.seed,
+            gravity_field=args.gravity_field,
+            integrator=args.integrator,
+            sector_lod=args.sector_lod,
+            headless=True,
+        )
+        stats = run(universe, args.ticks, 1 / args.tick_rate, args.player_fires)
+    else:
+        universe = build_universe(
+            asteroid_count=args.asteroids,
+            enemy_count=args.enemies,
+            seed=args.seed,
+            array_physics=not args.object_physics,
+            gravity_field=args.gravity_field,
+            integrator=args.integrator,
+            sector_lod=args.sector_lod,
+            headless=True,
+        )
+        stats = run(universe, args.ticks, 1 / args.tick_rate, args.player_fires)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
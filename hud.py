@@ -0,0 +1,86 @@
+import pygame
+from collections import OrderedDict
+from pygame import Color
+from pygame.math import Vector2
+from camera import Camera
+from profiler import profiler
+
+
+class TextCache:
+    """Renders text with one font, reusing the rendered Surfaces of recently used texts."""
+
+    def __init__(self, font_size: int = 32, capacity: int = 256):
+        """
+        Args:
+            capacity (int): How many rendered texts are kept. When exceeded,
+            the least recently used one is dropped.
+        """
+        self.font_size = font_size
+        self.capacity = capacity
+        self._font: pygame.font.Font | None = None
+        self._rendered: OrderedDict[
+            tuple[str, tuple[int, int, int, int]], pygame.Surface
+        ] = OrderedDict()
+
+    @property
+    def font(self) -> pygame.font.Font:
+        # Created lazily, so that a TextCache can exist before pygame.font.init()
+        if self._font is None:
+            self._font = pygame.font.Font(None, self.font_size)
+        return self._font
+
+    def render(self, text: str, color: Color) -> pygame.Surface:
+        key = (text, tuple(Color(color)))
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            return rendered
+
+        profiler.count("texts rendered")
+        rendered = self.font.render(text, True, color)
+        self._rendered[key] = rendered
+        if len(self._rendered) > self.capacity:
+            self._rendered.popitem(last=False)
+        return rendered
+
+
+class Hud:
+    """
+    Lines of text in the top-left corner of the screen.
+
+    The lines are composited onto an overlay Surface, which is only re-rendered
+    if some line changed since the last frame.
+    """
+
+    def __init__(
+        self,
+        font_size: int = 32,
+        color: Color = Color("white"),
+        margin: Vector2 = Vector2(10, 10),
+    ):
+        self.text_cache = TextCache(font_size)
+        self.color = color
+        self.margin = margin
+        self.line_height = font_size
+        self._lines: list[str | None] = []
+        self._overlay: pygame.Surface | None = None
+
+    def _render_overlay(self, lines: list[str | None]) -> pygame.Surface:
+        rendered = [
+            None if line is None else self.text_cache.render(line, self.color)
+            for line in lines
+        ]
+        width = max([r.get_width() for r in rendered if r is not None], default=1)
+        height = max(1, self.line_height * len(lines))
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        for i, line in enumerate(rendered):
+            if line is not None:
+                overlay.blit(line, (0, i * self.line_height))
+        return overlay
+
+    def draw(self, camera: Camera, lines: list[str | None]):
+        """Draws `lines` below each other. A `None` line leaves an empty line."""
+        if self._overlay is None or lines != self._lines:
+            self._overlay = self._render_overlay(lines)
+            self._lines = lines
+        camera.draw_surface(self._overlay, self.margin)
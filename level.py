@@ -0,0 +1,332 @@
+"""
+Levels: the planets, asteroids, areas, enemies and player spawn of a Universe.
+
+A level is written by hand as text, one entity per line:
+
+    # Comments start with '#'
+    size 10000 10000
+    player 5000 5000
+    planet 700 1300 1 400 turquoise    # x y density radius color (or 0xRRGGBB)
+    asteroid 900 300 12 -4 1 80        # x y vx vy density radius
+    refuel 5000 1000 5200 1200         # top-left and bottom-right corner
+    trophy 3000 5000 3200 5200
+    bullet_enemy 2000 2000             # x y [vx vy]
+    rocket_enemy 2500 2000
+
+and compiled into a binary file, which is memory-mapped when loaded: every kind of
+entity is a table of fixed-size records, stored exactly as the structured arrays
+below, so loading doesn't parse anything per entity.
+
+Example:
+    py level.py compile levels/default.txt levels/default.sglv
+    py level.py export levels/big.sglv --asteroids 1000 --seed 1
+"""
+
+import argparse
+import random
+import struct
+import time
+import numpy as np
+from pygame import Color
+from pygame.math import Vector2
+from ship import Ship, BulletEnemy, RocketEnemy
+from universe import Universe, Planet, Asteroid, RefuelArea, TrophyArea, Area
+from config import INTEGRATOR
+
+MAGIC = b"SGLV"
+VERSION = 1
+BINARY_EXTENSION = ".sglv"
+
+# magic, version, (unused), width, height, player x, player y,
+# planet count, asteroid count, area count, enemy count
+_HEADER = struct.Struct("<4sHHddddIIII")
+
+# Every record's size is a multiple of 8, so all tables stay aligned
+PLANET_DTYPE = np.dtype(
+    [
+        ("x", "<f8"),
+        ("y", "<f8"),
+        ("density", "<f8"),
+        ("radius", "<f8"),
+        ("color", "u1", (4,)),
+    ],
+    align=True,
+)
+ASTEROID_DTYPE = np.dtype(
+    [
+        ("x", "<f8"),
+        ("y", "<f8"),
+        ("vx", "<f8"),
+        ("vy", "<f8"),
+        ("density", "<f8"),
+        ("radius", "<f8"),
+    ]
+)
+AREA_DTYPE = np.dtype(
+    [("kind", "u1"), ("x0", "<f8"), ("y0", "<f8"), ("x1", "<f8"), ("y1", "<f8")],
+    align=True,
+)
+ENEMY_DTYPE = np.dtype(
+    [("kind", "u1"), ("x", "<f8"), ("y", "<f8"), ("vx", "<f8"), ("vy", "<f8")],
+    align=True,
+)
+
+# The text-keyword of every kind, in the order of their codes in the binary format
+AREA_KINDS: list[tuple[str, type[Area]]] = [
+    ("refuel", RefuelArea),
+    ("trophy", TrophyArea),
+]
+ENEMY_KINDS: list[tuple[str, type[BulletEnemy]]] = [
+    ("bullet_enemy", BulletEnemy),
+    ("rocket_enemy", RocketEnemy),
+]
+REFUEL, TROPHY = 0, 1
+BULLET_ENEMY, ROCKET_ENEMY = 0, 1
+
+
+def _format_number(x: float) -> str:
+    return str(int(x)) if x.is_integer() else repr(x)
+
+
+def _format_color(rgba: np.ndarray) -> str:
+    r, g, b, a = rgba.tolist()
+    if a == 255:
+        return f"0x{r:02x}{g:02x}{b:02x}"
+    return f"0x{r:02x}{g:02x}{b:02x}{a:02x}"
+
+
+class Level:
+    def __init__(
+        self,
+        size: Vector2,
+        player_pos: Vector2,
+        planets: np.ndarray | list[tuple],
+        asteroids: np.ndarray | list[tuple],
+        areas: np.ndarray | list[tuple],
+        enemies: np.ndarray | list[tuple],
+    ):
+        """
+        Args:
+            planets, asteroids, areas, enemies (np.ndarray | list[tuple]): Records of
+            PLANET_DTYPE, ASTEROID_DTYPE, AREA_DTYPE and ENEMY_DTYPE. Arrays of the
+            right dtype aren't copied (they may be memory-mapped).
+        """
+        self.size = size
+        self.player_pos = player_pos
+        self.planets = np.asarray(planets, dtype=PLANET_DTYPE)
+        self.asteroids = np.asarray(asteroids, dtype=ASTEROID_DTYPE)
+        self.areas = np.asarray(areas, dtype=AREA_DTYPE)
+        self.enemies = np.asarray(enemies, dtype=ENEMY_DTYPE)
+
+    def _tables(self) -> list[np.ndarray]:
+        return [self.planets, self.asteroids, self.areas, self.enemies]
+
+    @classmethod
+    def parse_text(cls, text: str) -> "Level":
+        """Parses the text format, see the top of this file."""
+        size = player_pos = None
+        planets: list[tuple] = []
+        asteroids: list[tuple] = []
+        areas: list[tuple] = []
+        enemies: list[tuple] = []
+        area_codes = {keyword: code for code, (keyword, _) in enumerate(AREA_KINDS)}
+        enemy_codes = {keyword: code for code, (keyword, _) in enumerate(ENEMY_KINDS)}
+
+        for line_number, line in enumerate(text.splitlines(), 1):
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            keyword, args = words[0], words[1:]
+            try:
+                if keyword == "planet" and len(args) == 5:
+                    x, y, density, radius = map(float, args[:4])
+                    planets.append((x, y, density, radius, tuple(Color(args[4]))))
+                elif keyword == "asteroid" and len(args) == 6:
+                    asteroids.append(tuple(map(float, args)))
+                elif keyword in area_codes and len(args) == 4:
+                    areas.append((area_codes[keyword], *map(float, args)))
+                elif keyword in enemy_codes and len(args) in (2, 4):
+                    x, y, vx, vy = map(float, args + ["0", "0"][: 4 - len(args)])
+                    enemies.append((enemy_codes[keyword], x, y, vx, vy))
+                elif keyword == "size" and len(args) == 2:
+                    size = Vector2(float(args[0]), float(args[1]))
+                elif keyword == "player" and len(args) == 2:
+                    player_pos = Vector2(float(args[0]), float(args[1]))
+                else:
+                    raise ValueError("unknown entity or wrong number of values")
+            except ValueError as error:
+                raise ValueError(f"Line {line_number}: {error}: {line!r}") from None
+
+        if size is None or player_pos is None:
+            raise ValueError("A level needs a 'size' and a 'player' line")
+        return cls(size, player_pos, planets, asteroids, areas, enemies)
+
+    def to_text(self) -> str:
+        lines = [
+            f"size {_format_number(self.size.x)} {_format_number(self.size.y)}",
+            f"player {_format_number(self.player_pos.x)}"
+            f" {_format_number(self.player_pos.y)}",
+        ]
+        for *numbers, rgba in self.planets.tolist():
+            lines.append(
+                f"planet {' '.join(map(_format_number, numbers))} {_format_color(rgba)}"
+            )
+        for numbers in self.asteroids.tolist():
+            lines.append(f"asteroid {' '.join(map(_format_number, numbers))}")
+        for kind, *numbers in self.areas.tolist():
+            lines.append(
+                f"{AREA_KINDS[kind][0]} {' '.join(map(_format_number, numbers))}"
+            )
+        for kind, x, y, vx, vy in self.enemies.tolist():
+            numbers = [x, y] if vx == vy == 0 else [x, y, vx, vy]
+            lines.append(
+                f"{ENEMY_KINDS[kind][0]} {' '.join(map(_format_number, numbers))}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def save_binary(self, path: str):
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            0,
+            self.size.x,
+            self.size.y,
+            self.player_pos.x,
+            self.player_pos.y,
+            *map(len, self._tables()),
+        )
+        with open(path, "wb") as file:
+            file.write(header)
+            for table in self._tables():
+                # Copied field by field, so that padding-bytes are always zero
+                padded = np.zeros(len(table), table.dtype)
+                for name in table.dtype.names:
+                    padded[name] = table[name]
+                file.write(padded.tobytes())
+
+    @classmethod
+    def load_binary(cls, path: str) -> "Level":
+        """Memory-maps a compiled level. Its tables are read-only views of the file."""
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(data) < _HEADER.size or bytes(data[:4]) != MAGIC:
+            raise ValueError(f"{path} is not a compiled level")
+        magic, version, _, width, height, player_x, player_y, *counts = (
+            _HEADER.unpack_from(data)
+        )
+        if version != VERSION:
+            raise ValueError(f"{path} has level format {version}, not {VERSION}")
+
+        tables = []
+        offset = _HEADER.size
+        for dtype, count in zip(
+            [PLANET_DTYPE, ASTEROID_DTYPE, AREA_DTYPE, ENEMY_DTYPE], counts
+        ):
+            if offset + count * dtype.itemsize > len(data):
+                raise ValueError(f"{path} is truncated")
+            tables.append(np.frombuffer(data, dtype, count, offset))
+            offset += count * dtype.itemsize
+        return cls(Vector2(width, height), Vector2(player_x, player_y), *tables)
+
+    @classmethod
+    def load(cls, path: str) -> "Level":
+        """Loads a level in either format, telling them apart by their first bytes."""
+        with open(path, "rb") as file:
+            is_binary = file.read(len(MAGIC)) == MAGIC
+        if is_binary:
+            return cls.load_binary(path)
+        with open(path, encoding="utf-8") as file:
+            return cls.parse_text(file.read())
+
+    def save(self, path: str):
+        """Saves the binary format if `path` ends in BINARY_EXTENSION, else text."""
+        if path.endswith(BINARY_EXTENSION):
+            self.save_binary(path)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(self.to_text())
+
+    def build_universe(
+        self,
+        array_physics: bool = True,
+        seed: int | None = None,
+        gravity_field: bool = False,
+        integrator: str = INTEGRATOR,
+        sector_lod: bool = False,
+        headless: bool = False,
+    ) -> Universe:
+        """Args are the same as for Universe."""
+        planets = [
+            Planet(Vector2(x, y), density, radius, Color(*rgba.tolist()))
+            for x, y, density, radius, rgba in self.planets.tolist()
+        ]
+        asteroids = [
+            Asteroid(Vector2(x, y), Vector2(vx, vy), density, radius)
+            for x, y, vx, vy, density, radius in self.asteroids.tolist()
+        ]
+        areas = [
+            AREA_KINDS[kind][1](Vector2(x0, y0), Vector2(x1, y1))
+            for kind, x0, y0, x1, y1 in self.areas.tolist()
+        ]
+        player_ship = Ship(
+            Vector2(self.player_pos), Vector2(0, 0), 1, 10, Color("turquoise")
+        )
+        enemy_ships = [
+            ENEMY_KINDS[kind][1](Vector2(x, y), Vector2(vx, vy), player_ship)
+            for kind, x, y, vx, vy in self.enemies.tolist()
+        ]
+        return Universe(
+            Vector2(self.size),
+            planets,
+            asteroids,
+            player_ship,
+            areas,
+            enemy_ships,
+            array_physics=array_physics,
+            seed=seed,
+            gravity_field=gravity_field,
+            integrator=integrator,
+            sector_lod=sector_lod,
+            headless=headless,
+        )
+
+
+def main():
+    # Imported here, as scenario builds its default map as a Level
+    from scenario import default_level
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subparsers.add_parser(
+        "compile", help="Convert a level between the text and binary format"
+    )
+    compile_parser.add_argument("source")
+    compile_parser.add_argument(
+        "destination", help=f"Binary if it ends in {BINARY_EXTENSION}, else text"
+    )
+    export_parser = subparsers.add_parser(
+        "export", help="Save the default map, with random asteroids and enemies"
+    )
+    export_parser.add_argument(
+        "destination", help=f"Binary if it ends in {BINARY_EXTENSION}, else text"
+    )
+    export_parser.add_argument("--asteroids", type=int, default=5)
+    export_parser.add_argument("--enemies", type=int, default=16)
+    export_parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        start = time.perf_counter()
+        level = Level.load(args.source)
+        loaded = time.perf_counter()
+        level.save(args.destination)
+        print(
+            f"Loaded {args.source} in {1000 * (loaded - start):.1f} ms,"
+            f" saved {args.destination}"
+        )
+    else:
+        level = default_level(args.asteroids, args.enemies, random.Random(args.seed))
+        level.save(args.destination)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,17 @@ from pygame import Color
 import sys
 import math
 import random
-from ship import Ship, BulletEnemy, RocketEnemy
+import argparse
+import time
+from ship import Ship
 from init import camera
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, WORLD_WIDTH, WORLD_HEIGHT
-from universe import Universe, Planet, Asteroid, RefuelArea, TrophyArea, Area
+from config import SCREEN_WIDTH, SCREEN_HEIGHT, TICK_RATE, INTEGRATOR
+from physics import INTEGRATORS
+from scenario import build_universe
+from level import Level
+from timestep import FixedTimestep
+from replay import Recording, get_input_bits
+from profiler import profiler
 
 # Initialize Pygame
 pygame.init()
@@ -19,56 +26,63 @@ mission_complete = False
 game_over = False
 
 
-# Create planets
-planets = [
-    Planet(Vector2(700, 1300), 1, 400, Color("turquoise")),
-    Planet(Vector2(1800, 6700), 1, 370, Color("darkred")),
-    Planet(Vector2(2300, 900), 1, 280, Color("green")),
-    Planet(Vector2(3400, 5300), 1, 420, Color("blue")),
-    Planet(Vector2(4000, 3700), 1, 280, Color("deeppink")),
-    Planet(Vector2(5000, 9000), 1, 380, Color("darkorange")),
-    Planet(Vector2(6000, 400), 1, 350, Color("royalblue")),
-    Planet(Vector2(7000, 3700), 1, 280, Color("orange")),
-    Planet(Vector2(8500, 8000), 1, 380, Color("mediumpurple")),
-    Planet(Vector2(9200, 4400), 1, 440, Color("darkslategray")),
-]
-
-player_ship = Ship(
-    Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2),
-    Vector2(0, 0),
-    1,
-    10,
-    Color("turquoise"),
+parser = argparse.ArgumentParser()
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--record", metavar="FILE", help="Record this game into FILE")
+parser.add_argument(
+    "--level",
+    metavar="FILE",
+    help="Play a level (text or compiled, see level.py) instead of the default map",
 )
-
-areas: list[Area] = [
-    RefuelArea(Vector2(5000, 1000), Vector2(5200, 1200)),
-    TrophyArea(Vector2(3000, 5000), Vector2(3200, 5200)),
-]
-
-asteroids: list[Asteroid] = []
-for _ in range(5):
-    pos = Vector2(random.uniform(0, WORLD_WIDTH), random.uniform(0, WORLD_HEIGHT))
-    vel = Vector2(random.uniform(0, WORLD_WIDTH), random.uniform(0, WORLD_HEIGHT))
-    radius = random.uniform(40, 120)
-    asteroids.append(Asteroid(pos, vel, 1, radius))
-
-enemy_ships: list[BulletEnemy] = []
-for _ in range(16):
-    pos = Vector2(random.randint(0, WORLD_WIDTH), random.randint(0, WORLD_HEIGHT))
-    if random.random() > 0.5:
-        enemy_ships.append(BulletEnemy(pos, Vector2(0, 0), player_ship))
-    else:
-        enemy_ships.append(RocketEnemy(pos, Vector2(0, 0), player_ship))
-
-universe = Universe(
-    Vector2(WORLD_WIDTH, WORLD_HEIGHT),
-    planets,
-    asteroids,
-    player_ship,
-    areas,
-    enemy_ships,
+parser.add_argument(
+    "--gravity-field",
+    action="store_true",
+    help="Interpolate gravity from a precomputed field (cached in gravity_cache/)",
+)
+parser.add_argument("--integrator", choices=INTEGRATORS, default=INTEGRATOR)
+parser.add_argument(
+    "--tick-rate",
+    type=float,
+    default=TICK_RATE,
+    help="Simulation ticks per second (leapfrog stays stable with far fewer)",
 )
+parser.add_argument(
+    "--sector-lod",
+    action="store_true",
+    help="Simulate bodies far from the player less often",
+)
+args = parser.parse_args()
+if args.level is not None and args.record is not None:
+    # Recordings only describe the default map
+    parser.error("--record can't be combined with --level")
+
+seed = args.seed if args.seed is not None else random.randrange(2**32)
+if args.level is not None:
+    universe = Level.load(args.level).build_universe(
+        seed=seed,
+        gravity_field=args.gravity_field,
+        integrator=args.integrator,
+        sector_lod=args.sector_lod,
+    )
+else:
+    universe = build_universe(
+        seed=seed,
+        gravity_field=args.gravity_field,
+        integrator=args.integrator,
+        sector_lod=args.sector_lod,
+    )
+player_ship = universe.player_ship
+
+recording: Recording | None = None
+if args.record is not None:
+    recording = Recording(
+        seed,
+        len(universe.asteroids),
+        len(universe.enemy_ships),
+        gravity_field=args.gravity_field,
+        integrator=args.integrator,
+        sector_lod=args.sector_lod,
+    )
 
 
 # I can't *believe* that math doesn't have a sign-function
@@ -112,123 +126,64 @@ class Square:
         )
 
 
-def draw_minimap():
-    # TODO: Reimplement this with another instance of the Camera class :)
-    # Or maybe we even need specialised draw-methods for every PhysicalObject
-    # we want to draw?
-    pass
-    """
-    MINIMAP_SIZE = 250  # Size of the minimap (width and height)
-    MINIMAP_MARGIN = 20  # Margin from the top-right corner
-    MINIMAP_BORDER_COLOR = (150, 150, 150)  # Light gray border
-    MINIMAP_BACKGROUND_COLOR = (30, 30, 30)  # Dark gray background
-    MINIMAP_SHIP_COLOR = (0, 255, 0)  # Green for the player's ship
-    
-    # Calculate the position of the minimap
-    minimap_x = SCREEN_WIDTH - MINIMAP_SIZE - MINIMAP_MARGIN
-    minimap_y = MINIMAP_MARGIN
-
-    # Draw minimap background
-    pygame.draw.rect(
-        screen,
-        MINIMAP_BACKGROUND_COLOR,
-        (minimap_x, minimap_y, MINIMAP_SIZE, MINIMAP_SIZE),
-    )
-
-    # Draw minimap border
-    pygame.draw.rect(
-        screen,
-        MINIMAP_BORDER_COLOR,
-        (minimap_x, minimap_y, MINIMAP_SIZE, MINIMAP_SIZE),
-        2,
-    )
-
-    # Calculate scaling factors
-    scale = MINIMAP_SIZE / WORLD_WIDTH
-
-    # Draw player's ship
-    ship_minimap_x = int(minimap_x + ship.pos[0] * scale)
-    ship_minimap_y = int(minimap_y + ship.pos[1] * scale)
-    pygame.draw.circle(screen, MINIMAP_SHIP_COLOR, (ship_minimap_x, ship_minimap_y), 2)
-
-    # Draw planets
-    for planet in planets:
-        planet_minimap_x = int(minimap_x + planet.pos[0] * scale)
-        planet_minimap_y = int(minimap_y + planet.pos[1] * scale)
-        pygame.draw.circle(
-            screen,
-            planet.color,
-            (planet_minimap_x, planet_minimap_y),
-            max(1, planet.radius / scale ** (-1)),
-        )
-
-    # Draw enemies
-    for enemy in enemies:
-        enemy_minimap_x = int(minimap_x + enemy.pos[0] * scale)
-        enemy_minimap_y = int(minimap_y + enemy.pos[1] * scale)
-        pygame.draw.circle(screen, enemy.color, (enemy_minimap_x, enemy_minimap_y), 2)
-
-    for asteroid in asteroids:
-        asteroid_minimap_x = int(minimap_x + asteroid.pos[0] * scale)
-        asteroid_minimap_y = int(minimap_y + asteroid.pos[1] * scale)
-        pygame.draw.circle(
-            screen,
-            asteroid.color,
-            (asteroid_minimap_x, asteroid_minimap_y),
-            max(1, asteroid.radius / scale ** (-1)),
-        )
-
-    for spacegun in spaceguns:
-        spacegun_minimap_x = int(minimap_x + spacegun.pos[0] * scale)
-        spacegun_minimap_y = int(minimap_y + spacegun.pos[1] * scale)
-        pygame.draw.rect(
-            screen,
-            spacegun.color,
-            (
-                spacegun_minimap_x,
-                spacegun_minimap_y,
-                max(7, spacegun.size * scale),
-                max(7, spacegun.size * scale),
-            ),
-        )
-    """
-
-
 running = True
 clock = pygame.time.Clock()
+timestep = FixedTimestep(args.tick_rate)
 while running:
-    dt = clock.tick() / 1000
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+    frame_time = clock.tick() / 1000
+    with profiler.scope("frame/events"):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.set_enabled(not profiler.enabled)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                if profiler.enabled:
+                    profiler.export_chrome_trace(f"trace-{int(time.time())}.json")
 
     camera.start_drawing_new_frame()
     if game_over:
         font = pygame.font.Font(None, 64)
         camera.draw_text("GAME OVER", None, font, Color("red"))
     else:
-        # TODO: reimplement drawing the grid
-
         # Handle input
         keys = pygame.key.get_pressed()
         player_ship.thruster_rot_left = keys[pygame.K_RIGHT]
         player_ship.thruster_rot_right = keys[pygame.K_LEFT]
         player_ship.thruster_forward = keys[pygame.K_UP]
         player_ship.thruster_backward = keys[pygame.K_DOWN]
-        if keys[pygame.K_SPACE]:
-            player_ship.shoot()
-
-        universe.step(dt)
 
-        if not universe.contains_point(player_ship.pos) or player_ship.health <= 0:
-            game_over = True
-        camera.smoothly_focus_points(
-            [player_ship.pos, player_ship.pos + 1 * player_ship.vel], 500, dt
-        )
+        # Simulate in fixed-size ticks, independent of the frame rate
+        with profiler.scope("frame/simulate"):
+            for _ in range(timestep.advance(frame_time)):
+                if keys[pygame.K_SPACE]:
+                    player_ship.shoot()
+                if recording is not None:
+                    bits = get_input_bits(player_ship, keys[pygame.K_SPACE])
+                    recording.record_tick(timestep.dt, bits)
+                universe.step(timestep.dt)
+
+                if (
+                    not universe.contains_point(player_ship.pos)
+                    or player_ship.health <= 0
+                ):
+                    game_over = True
+                    break
+
+        with profiler.scope("frame/draw"), universe.interpolated(timestep.alpha):
+            camera.smoothly_focus_points(
+                [player_ship.pos, player_ship.pos + 1 * player_ship.vel],
+                500,
+                frame_time,
+            )
+            universe.draw(camera)
 
-        universe.draw(camera)
+    with profiler.scope("frame/flip"):
+        pygame.display.flip()
+    profiler.end_frame()
 
-    pygame.display.flip()
+if recording is not None:
+    recording.save(args.record)
 
 pygame.quit()
 sys.exit()
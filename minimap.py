@@ -0,0 +1,158 @@
+import math
+import time
+import numpy as np
+import pygame
+import pygame.surfarray
+from pygame import Color
+from camera import Camera
+from physics import PhysicalObject
+from config import MINIMAP_REFRESH_RATE
+from profiler import profiler
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from universe import Universe
+
+MINIMAP_SIZE = 250  # Size of the minimap (width and height)
+MINIMAP_MARGIN = 20  # Margin from the top-right corner
+MINIMAP_BORDER_COLOR = Color(150, 150, 150)  # Light gray border
+MINIMAP_BACKGROUND_COLOR = Color(30, 30, 30)  # Dark gray background
+MINIMAP_SHIP_COLOR = Color(0, 255, 0)  # Green for the player's ship
+
+
+class Minimap:
+    """
+    A map of the whole Universe in the top-right corner of the screen.
+
+    The static layer (world border, planets and areas) is rendered once. Markers for
+    everything that moves are plotted onto a copy of it at most `refresh_rate` times
+    per second, and the same surface is blitted in between.
+    """
+
+    def __init__(
+        self,
+        universe: "Universe",
+        size: int = MINIMAP_SIZE,
+        margin: int = MINIMAP_MARGIN,
+        refresh_rate: float = MINIMAP_REFRESH_RATE,
+    ):
+        self.universe = universe
+        self.size = size
+        self.margin = margin
+        self.refresh_rate = refresh_rate
+        self.scale = size / max(universe.size.x, universe.size.y)
+        self._static: pygame.Surface | None = None
+        self._surface: pygame.Surface | None = None
+        self._last_refresh = -math.inf
+        # Per kind of marker: The ids of the objects, and their mapped colors
+        self._marker_colors: dict[str, tuple[list[int], np.ndarray]] = {}
+
+    def invalidate(self):
+        """Re-render the static layer, e.g. after planets or areas changed."""
+        self._static = None
+        self._surface = None
+
+    def _render_static(self) -> pygame.Surface:
+        # 32 bits per pixel, so that markers can be plotted with surfarray
+        surface = pygame.Surface((self.size, self.size), depth=32)
+        surface.fill(MINIMAP_BACKGROUND_COLOR)
+        for area in self.universe.areas:
+            pygame.draw.rect(
+                surface,
+                area.color,
+                pygame.Rect(
+                    area.top_left * self.scale,
+                    (area.bottom_right - area.top_left) * self.scale,
+                ),
+            )
+        for planet in self.universe.planets:
+            pygame.draw.circle(
+                surface,
+                planet.color,
+                planet.pos * self.scale,
+                max(1, planet.radius * self.scale),
+            )
+        pygame.draw.rect(surface, MINIMAP_BORDER_COLOR, surface.get_rect(), 2)
+        return surface
+
+    def _map_colors(self, surface: pygame.Surface, colors: list[Color]) -> np.ndarray:
+        """Returns the pixel-values of `colors` on `surface`."""
+        return np.array(list(map(surface.map_rgb, colors)), dtype=np.uint32)
+
+    def _get_marker_colors(
+        self, surface: pygame.Surface, kind: str, pobjs: list[PhysicalObject]
+    ) -> np.ndarray:
+        """
+        Returns the pixel-values of the colors of `pobjs`. They're only mapped again
+        if `pobjs` changed since the last refresh, as colors never change.
+        """
+        ids = list(map(id, pobjs))
+        cached = self._marker_colors.get(kind)
+        if cached is not None and cached[0] == ids:
+            return cached[1]
+        mapped = self._map_colors(surface, [pobj.color for pobj in pobjs])
+        self._marker_colors[kind] = (ids, mapped)
+        return mapped
+
+    def _plot(
+        self,
+        pixels: np.ndarray,
+        points: np.ndarray,
+        mapped_colors: np.ndarray,
+        marker_size: int,
+    ):
+        """Plots a square marker for each worldspace-point, all at once."""
+        xy = (points * self.scale).astype(np.intp)
+        inside = np.flatnonzero(
+            (xy >= 0).all(axis=1) & (xy <= self.size - marker_size).all(axis=1)
+        )
+        x, y, mapped_colors = xy[inside, 0], xy[inside, 1], mapped_colors[inside]
+        for dx in range(marker_size):
+            for dy in range(marker_size):
+                pixels[x + dx, y + dy] = mapped_colors
+
+    def _render_markers(self) -> pygame.Surface:
+        universe = self.universe
+        surface = self._static.copy()
+        pixels = pygame.surfarray.pixels2d(surface)
+
+        pool = universe.projectiles
+        self._plot(
+            pixels,
+            pool.pos[: pool.count],
+            self._map_colors(surface, pool.colors)[pool.color_index[: pool.count]],
+            1,
+        )
+        self._plot(
+            pixels,
+            universe.positions(universe.asteroids),
+            self._get_marker_colors(surface, "asteroids", universe.asteroids),
+            2,
+        )
+        self._plot(
+            pixels,
+            universe.positions(universe.enemy_ships),
+            self._get_marker_colors(surface, "enemy ships", universe.enemy_ships),
+            2,
+        )
+        del pixels  # Unlocks the surface
+
+        pygame.draw.circle(
+            surface, MINIMAP_SHIP_COLOR, universe.player_ship.pos * self.scale, 3
+        )
+        return surface
+
+    def draw(self, camera: Camera):
+        if self._static is None:
+            self._static = self._render_static()
+
+        now = time.perf_counter()
+        if self._surface is None or now - self._last_refresh >= 1 / self.refresh_rate:
+            profiler.count("minimap refreshes")
+            self._surface = self._render_markers()
+            self._last_refresh = now
+
+        width = camera.surface.get_width()
+        camera.draw_surface(
+            self._surface, (width - self.size - self.margin, self.margin)
+        )
@@ -3,26 +3,82 @@ import pygame.camera
 from pygame.math import Vector2
 from camera import Camera
 import math
+import numpy as np
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from body_arrays import BodyArrays
 
 GRAVITATIONAL_CONSTANT = 0.0006
 
+# "euler" moves bodies first, then applies gravity at their new positions.
+# "leapfrog" is velocity-Verlet, substepped near planets, see `leapfrog`.
+INTEGRATORS = ["euler", "leapfrog"]
+
 
 class PhysicalObject:
     """A physical object with dynamic position, dynamic velocity, and constant nonzero mass."""
 
     def __init__(self, pos: Vector2, vel: Vector2, mass: float):
-        self.pos = pos
+        # If `arrays` is set (see BodyArrays.add), pos and vel live in
+        # row `row` of those arrays instead of in `_pos` and `_vel`.
+        self.arrays: "BodyArrays | None" = None
+        self.row = -1
+        self._pos = pos
         self.mass = mass
-        self.vel = vel
+        self._vel = vel
+
+    @property
+    def pos(self) -> Vector2:
+        if self.arrays is None:
+            return self._pos
+        # A copy: write changes back with `self.pos = ...` (or `+=`, `-=`, ...)
+        return Vector2(self.arrays.pos[self.row].tolist())
+
+    @pos.setter
+    def pos(self, value: Vector2):
+        if self.arrays is None:
+            self._pos = value
+        else:
+            self.arrays.pos[self.row] = (value.x, value.y)
+
+    @property
+    def prev_pos(self) -> Vector2:
+        """
+        The position before the last step. Only objects bound to BodyArrays remember
+        it, all others return their current position.
+        """
+        if self.arrays is None:
+            return self.pos
+        return Vector2(self.arrays.prev_pos[self.row].tolist())
+
+    @property
+    def vel(self) -> Vector2:
+        if self.arrays is None:
+            return self._vel
+        return Vector2(self.arrays.vel[self.row].tolist())
+
+    @vel.setter
+    def vel(self, value: Vector2):
+        if self.arrays is None:
+            self._vel = value
+        else:
+            self.arrays.vel[self.row] = (value.x, value.y)
 
     def step(self, dt: float):
-        self.pos += dt * self.vel
+        # Bound objects are integrated all at once by BodyArrays.integrate
+        if self.arrays is None:
+            self.pos += dt * self.vel
 
     def add_impulse(self, impulse: Vector2):
         self.vel += impulse / self.mass
 
     def apply_force(self, force: Vector2, dt: float):
-        self.add_impulse(force * dt)
+        if self.arrays is None:
+            self.add_impulse(force * dt)
+        else:
+            # Accumulated, and applied in BodyArrays.integrate
+            self.arrays.force[self.row] += (force.x, force.y)
 
     def gravitational_force(self, pobj: "PhysicalObject") -> Vector2:
         """Returns the gravitational force between `self` and `pobj` that affects `self`."""
@@ -41,6 +97,11 @@ class PhysicalObject:
         pass
 
 
+def disk_mass(radius: float | np.ndarray) -> float | np.ndarray:
+    """The mass of a Disk, given its radius. Works on arrays of radii, too."""
+    return radius**3 * math.pi * 4 / 3
+
+
 class Disk(PhysicalObject):
     """A disk-shaped PhysicalObject, with constant radius and dynamic color."""
 
@@ -52,8 +113,7 @@ class Disk(PhysicalObject):
         radius: float,
         color: pygame.Color,
     ):
-        mass = radius**3 * math.pi * 4 / 3
-        super().__init__(pos, vel, mass)
+        super().__init__(pos, vel, disk_mass(radius))
         self.radius = radius
         self.color = color
         self._radius_squared = radius**2
@@ -115,6 +175,335 @@ class Disk(PhysicalObject):
             return None
 
 
+class _TreeLevel:
+    """The nodes of one depth of a BarnesHutTree, in Morton-order."""
+
+    def __init__(
+        self,
+        prefix: np.ndarray,
+        count: np.ndarray,
+        mass: np.ndarray,
+        center_of_mass: np.ndarray,
+        size: float,
+    ):
+        self.prefix = prefix  # The Morton-key prefix shared by the node's bodies
+        self.count = count
+        self.mass = mass
+        # Separate coordinates, as indexing 1D arrays is much faster
+        self.x = np.ascontiguousarray(center_of_mass[:, 0])
+        self.y = np.ascontiguousarray(center_of_mass[:, 1])
+        self.size = size  # Side length of the node's square
+        # Range of the node's children in the next level, set by BarnesHutTree
+        self.child_start = np.zeros(len(prefix), dtype=np.intp)
+        self.child_end = np.zeros(len(prefix), dtype=np.intp)
+        self.is_leaf = count == 1
+
+
+class BarnesHutTree:
+    """
+    A quadtree over gravitating bodies, approximating the gravity of far-away groups
+    of bodies by their center of mass. Mutual gravity of n bodies then costs
+    O(n log n) instead of O(n²).
+
+    The tree is linear: bodies are sorted by the Morton-key of their position, so the
+    bodies of every node are a contiguous range, and every depth of the tree is
+    built and traversed for all bodies at once with NumPy. Rebuild it every tick.
+    """
+
+    def __init__(self, pos: np.ndarray, mass: np.ndarray, max_depth: int = 16):
+        """
+        Args:
+            pos (np.ndarray): Shape (n, 2), positions of the bodies.
+            mass (np.ndarray): Shape (n,), their (positive) masses.
+            max_depth (int): Bodies closer than 1/2**max_depth of the whole tree's
+            size share a leaf. At most 31.
+        """
+        n = len(mass)
+        self.max_depth = max_depth
+        self.levels: list[_TreeLevel] = []
+        if n == 0:
+            self.order = np.zeros(0, dtype=np.intp)
+            return
+
+        corner = pos.min(axis=0)
+        size = max(float(np.ptp(pos, axis=0).max()), 1e-9) * (1 + 1e-9)
+        cells = 2**max_depth
+        cell = np.clip(((pos - corner) * (cells / size)).astype(np.int64), 0, cells - 1)
+        keys = _interleave_bits(cell[:, 0]) | (_interleave_bits(cell[:, 1]) << 1)
+
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        sorted_pos = pos[self.order]
+        self.x = np.ascontiguousarray(sorted_pos[:, 0])
+        self.y = np.ascontiguousarray(sorted_pos[:, 1])
+        self.mass = mass[self.order]
+        weighted_pos = sorted_pos * self.mass[:, None]
+
+        for depth in range(max_depth + 1):
+            prefix = self.keys >> np.uint64(2 * (max_depth - depth))
+            starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]])
+            node_mass = np.add.reduceat(self.mass, starts)
+            level = _TreeLevel(
+                prefix[starts],
+                np.diff(np.r_[starts, n]),
+                node_mass,
+                np.add.reduceat(weighted_pos, starts) / node_mass[:, None],
+                size / 2**depth,
+            )
+            if self.levels:
+                parent = self.levels[-1]
+                parent_of_child = level.prefix >> np.uint64(2)
+                parent.child_start = np.searchsorted(parent_of_child, parent.prefix)
+                parent.child_end = np.searchsorted(
+                    parent_of_child, parent.prefix, side="right"
+                )
+            self.levels.append(level)
+            if len(starts) == n:
+                break  # Every node is a single body
+        # Bodies closer than the deepest level share its leaves
+        self.levels[-1].is_leaf[:] = True
+
+    def acceleration(
+        self, theta: float = 0.5, softening: float = 0.0, chunk_size: int = 8192
+    ) -> np.ndarray:
+        """
+        Returns the acceleration of every body (shape (n, 2), in the original order)
+        due to all other bodies.
+
+        Args:
+            theta (float): The opening angle. A node is approximated by its center of
+            mass if its size is less than `theta` times its distance. 0 is exact.
+            softening (float): Added to all distances (in quadrature), to keep close
+            encounters from blowing up. 0 is the same model as `gravitational_force`.
+            chunk_size (int): Bodies are processed in chunks of this many, to bound
+            memory.
+        """
+        n = len(self.order)
+        acceleration = np.zeros((n, 2))
+        for start in range(0, n, chunk_size):
+            bodies = np.arange(start, min(n, start + chunk_size))
+            acceleration[bodies] = self._chunk_acceleration(bodies, theta, softening)
+        result = np.empty((n, 2))
+        result[self.order] = acceleration
+        return result
+
+    def _chunk_acceleration(
+        self, bodies: np.ndarray, theta: float, softening: float
+    ) -> np.ndarray:
+        first = bodies[0]
+        acceleration = np.zeros((len(bodies), 2))
+        # Every (body, node)-pair still to be considered, starting with the root
+        body = bodies
+        node = np.zeros(len(bodies), dtype=np.intp)
+        for depth, level in enumerate(self.levels):
+            if len(body) == 0:
+                break
+            dx = level.x[node] - self.x[body]
+            dy = level.y[node] - self.y[body]
+            dist_squared = dx * dx + dy * dy
+            accept = level.is_leaf[node] | (level.size**2 < theta**2 * dist_squared)
+
+            # Approximate accepted nodes by their center of mass
+            accepted_body, accepted_node = body[accept], node[accept]
+            mass = level.mass[accepted_node]
+            dx, dy, dist_squared = dx[accept], dy[accept], dist_squared[accept]
+            # A body must not attract itself. If its node contains it, take it out
+            shift = np.uint64(2 * (self.max_depth - depth))
+            contains = (self.keys[accepted_body] >> shift) == level.prefix[
+                accepted_node
+            ]
+            if contains.any():
+                rest = np.flatnonzero(contains & (level.count[accepted_node] > 1))
+                own_mass = self.mass[accepted_body[rest]]
+                # The center of mass without the body is this much farther away
+                factor = mass[rest] / (mass[rest] - own_mass)
+                dx[rest] *= factor
+                dy[rest] *= factor
+                dist_squared[rest] *= factor * factor
+                mass[rest] -= own_mass
+                # Nodes of just the body itself don't attract at all
+                mass[contains & (level.count[accepted_node] == 1)] = 0
+                dist_squared[mass == 0] = 1
+            dist_squared += softening**2
+            scale = (
+                GRAVITATIONAL_CONSTANT * mass / (dist_squared * np.sqrt(dist_squared))
+            )
+            index = accepted_body - first
+            acceleration[:, 0] += np.bincount(
+                index, weights=scale * dx, minlength=len(bodies)
+            )
+            acceleration[:, 1] += np.bincount(
+                index, weights=scale * dy, minlength=len(bodies)
+            )
+
+            # Replace opened nodes by their children
+            opened_body, opened_node = body[~accept], node[~accept]
+            child_start = level.child_start[opened_node]
+            child_count = level.child_end[opened_node] - child_start
+            body = np.repeat(opened_body, child_count)
+            offsets = np.arange(len(body)) - np.repeat(
+                np.cumsum(child_count) - child_count, child_count
+            )
+            node = np.repeat(child_start, child_count) + offsets
+        return acceleration
+
+
+def _interleave_bits(values: np.ndarray) -> np.ndarray:
+    """Spreads the lower 32 bits of every value to the even bits of a uint64."""
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in [
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ]:
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def direct_gravitational_acceleration(
+    pos: np.ndarray,
+    mass: np.ndarray,
+    bodies: np.ndarray | None = None,
+    softening: float = 0.0,
+) -> np.ndarray:
+    """
+    Like `BarnesHutTree.acceleration`, but summing over every pair of bodies.
+    O(n²), as a reference for the tree.
+
+    Args:
+        bodies (np.ndarray | None): Indices of the bodies to compute the acceleration
+        of, all if None. The result has one row per index.
+    """
+    n = len(mass)
+    if bodies is None:
+        bodies = np.arange(n)
+    x, y = np.ascontiguousarray(pos[:, 0]), np.ascontiguousarray(pos[:, 1])
+    acceleration = np.zeros((len(bodies), 2))
+    # About a million pairs at once, to bound memory
+    chunk_size = max(1, 2**20 // max(n, 1))
+    for start in range(0, len(bodies), chunk_size):
+        chunk = bodies[start : start + chunk_size]
+        dx = x[None, :] - x[chunk, None]
+        dy = y[None, :] - y[chunk, None]
+        dist_squared = dx * dx + dy * dy + softening**2
+        # A body doesn't attract itself
+        dist_squared[np.arange(len(chunk)), chunk] = np.inf
+        scale = GRAVITATIONAL_CONSTANT * mass / (dist_squared * np.sqrt(dist_squared))
+        acceleration[start : start + len(chunk), 0] = (scale * dx).sum(axis=1)
+        acceleration[start : start + len(chunk), 1] = (scale * dy).sum(axis=1)
+    return acceleration
+
+
+def substep_counts(
+    dt: float,
+    acceleration: np.ndarray,
+    distance: np.ndarray,
+    accuracy: float,
+    max_substeps: int,
+) -> np.ndarray:
+    """
+    Returns how many substeps every body needs during a step of `dt`: enough that each
+    substep is at most `accuracy` times the body's local orbital timescale
+    sqrt(distance / |acceleration|), i.e. 1/angular velocity on a circular orbit.
+    Counts are powers of two (at most `max_substeps`), so that bodies form few groups.
+
+    Args:
+        acceleration (np.ndarray): Shape (n, 2), the gravitational acceleration.
+        distance (np.ndarray): Shape (n,), distance to the nearest attracting body.
+    """
+    strength = np.sqrt(np.einsum("ij,ij->i", acceleration, acceleration))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        needed = dt / accuracy * np.sqrt(strength / distance)
+    needed = np.nan_to_num(needed, nan=1.0, posinf=max_substeps)
+    exponent = np.ceil(np.log2(np.clip(needed, 1, max_substeps)))
+    return (2 ** exponent.astype(np.int64)).clip(1, max_substeps)
+
+
+def leapfrog(
+    pos: np.ndarray,
+    vel: np.ndarray,
+    dt: float,
+    acceleration_at: Callable[[np.ndarray], np.ndarray],
+    acceleration: np.ndarray,
+    substeps: np.ndarray,
+):
+    """
+    Advances all bodies by `dt` with velocity-Verlet (kick-drift-kick leapfrog), in
+    place. Unlike Euler, it's symplectic: orbits keep their energy (up to a bounded
+    wobble) instead of spiralling outwards.
+
+    Every group of bodies with the same number of substeps is integrated separately,
+    so only the bodies close to planets pay for the smaller steps.
+
+    Args:
+        pos (np.ndarray): Shape (n, 2).
+        vel (np.ndarray): Shape (n, 2).
+        acceleration_at (Callable): Returns the acceleration at given points.
+        acceleration (np.ndarray): Shape (n, 2), `acceleration_at(pos)`.
+        substeps (np.ndarray): Shape (n,), e.g. from `substep_counts`.
+    """
+    for count in np.unique(substeps).tolist():
+        rows = np.flatnonzero(substeps == count)
+        group_pos, group_vel = pos[rows], vel[rows]
+        group_acceleration = acceleration[rows]
+        half_kick = dt / count / 2
+        for _ in range(count):
+            group_vel += half_kick * group_acceleration
+            group_pos += (2 * half_kick) * group_vel
+            group_acceleration = acceleration_at(group_pos)
+            group_vel += half_kick * group_acceleration
+        pos[rows] = group_pos
+        vel[rows] = group_vel
+
+
+def segment_disk_toi(
+    start: np.ndarray, end: np.ndarray, center: np.ndarray, radius: np.ndarray
+) -> np.ndarray:
+    """
+    For points moving in a straight line from `start` to `end` (shape (n, 2)), returns
+    the fraction of the way (in [0, 1]) at which each first touches the disk with
+    `center` and `radius`. That's 0 if it starts inside, and inf if it never touches.
+
+    Unlike testing only `end`, this can't miss thin disks that a fast point passes
+    through within a single step.
+    """
+    return _swept_toi(start - center, end - center, radius)
+
+
+def disk_disk_toi(
+    start_a: np.ndarray,
+    end_a: np.ndarray,
+    radius_a: np.ndarray,
+    start_b: np.ndarray,
+    end_b: np.ndarray,
+    radius_b: np.ndarray,
+) -> np.ndarray:
+    """
+    Like `segment_disk_toi`, but for pairs of disks both moving in a straight line
+    during the same step: returns the fraction of the step at which they first touch.
+    """
+    return _swept_toi(start_a - start_b, end_a - end_b, radius_a + radius_b)
+
+
+def _swept_toi(start: np.ndarray, end: np.ndarray, radius: np.ndarray) -> np.ndarray:
+    """`segment_disk_toi`, for disks centered at the origin."""
+    x, y = start[:, 0], start[:, 1]
+    dx, dy = end[:, 0] - x, end[:, 1] - y
+    # Solve |start + t (end - start)|² = radius² for the smaller t
+    a = dx * dx + dy * dy
+    b = x * dx + y * dy
+    c = x * x + y * y - radius * radius
+    discriminant = b * b - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        toi = (-b - np.sqrt(discriminant)) / a
+    toi[~((discriminant >= 0) & (a > 0) & (toi >= 0) & (toi <= 1))] = np.inf
+    # Like Disk.intersects_point, points on the boundary are outside
+    toi[c < 0] = 0
+    return toi
+
+
 # TODO: Probably move to some other module.
 # Should the celestial bodies be moved somewhere else, too?
 class Bullet(PhysicalObject):
@@ -0,0 +1,140 @@
+"""
+A lightweight frame profiler.
+
+Wrap phases in `with profiler.scope("name"):`, count work with `profiler.count("name", n)`.
+While disabled, both do (almost) nothing.
+"""
+
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NULL_SCOPE = nullcontext()
+
+
+class _Scope:
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.profiler._events.append((self.name, self.start, end - self.start))
+
+
+class Frame:
+    """Timings and counters recorded during one frame."""
+
+    def __init__(self, start: int):
+        self.start = start  # in ns
+        self.events: list[tuple[str, int, int]] = []  # (name, start, duration) in ns
+        self.counters: dict[str, int] = {}
+
+
+class Profiler:
+    def __init__(self, history: int = 300, average_frames: int = 60):
+        """
+        Args:
+            history (int): How many past frames are kept for trace export.
+            average_frames (int): How many past frames the rolling averages span.
+        """
+        self.enabled = False
+        self.frames: deque[Frame] = deque(maxlen=history)
+        self.average_frames = average_frames
+        self._events: list[tuple[str, int, int]] = []
+        self._counters: dict[str, int] = {}
+        self._frame_start = 0
+
+        # Rolling sums over the last `average_frames` frames
+        self._averaged: deque[dict[str, float]] = deque()
+        self._sums: dict[str, float] = {}
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self.frames.clear()
+        self._averaged.clear()
+        self._sums.clear()
+        self._events = []
+        self._counters = {}
+        self._frame_start = time.perf_counter_ns()
+
+    def scope(self, name: str):
+        """A context manager timing everything inside it under `name`."""
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def count(self, name: str, amount: int = 1):
+        """Counts `amount` units of work of kind `name` in the current frame."""
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def end_frame(self):
+        """Closes the current frame, and starts the next one."""
+        if not self.enabled:
+            return
+        frame = Frame(self._frame_start)
+        frame.events = self._events
+        frame.counters = self._counters
+        self.frames.append(frame)
+        self._events = []
+        self._counters = {}
+        self._frame_start = time.perf_counter_ns()
+
+        # Milliseconds per scope (summed, if a scope ran multiple times) and counters
+        totals: dict[str, float] = dict(frame.counters)
+        for name, _, duration in frame.events:
+            totals[name] = totals.get(name, 0) + duration / 1e6
+        self._averaged.append(totals)
+        for name, value in totals.items():
+            self._sums[name] = self._sums.get(name, 0) + value
+        if len(self._averaged) > self.average_frames:
+            for name, value in self._averaged.popleft().items():
+                self._sums[name] -= value
+
+    def get_averages(self) -> dict[str, float]:
+        """
+        Returns the average per frame, over the last frames, of every scope (in ms)
+        and every counter. Keys are sorted.
+        """
+        frames = max(1, len(self._averaged))
+        return {name: self._sums[name] / frames for name in sorted(self._sums)}
+
+    def export_chrome_trace(self, path: str):
+        """
+        Writes the kept frames in Chrome's trace-event format, viewable in
+        chrome://tracing or https://ui.perfetto.dev.
+        """
+        events: list[dict] = []
+        for frame in self.frames:
+            for name, start, duration in frame.events:
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": start / 1000,
+                        "dur": duration / 1000,
+                        "pid": 0,
+                        "tid": 0,
+                    }
+                )
+            for name, value in frame.counters.items():
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "C",
+                        "ts": frame.start / 1000,
+                        "pid": 0,
+                        "args": {name: value},
+                    }
+                )
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+# The profiler everything reports to
+profiler = Profiler()
@@ -0,0 +1,189 @@
+import math
+import numpy as np
+from pygame import Color
+from pygame.math import Vector2
+from camera import Camera
+from config import PROJECTILE_POOL_SIZE, PROJECTILE_LIFETIME
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ship import Ship
+
+# Shape of a drawn projectile, see Bullet.draw
+_TIP_LENGTH = 5
+_BACK_LENGTH = 2
+_BACK_COS = math.cos(math.radians(150))
+_BACK_SIN = math.sin(math.radians(150))
+
+
+class ProjectilePool:
+    """
+    A fixed-size pool holding all projectiles of a Universe in flat arrays.
+
+    Rows are kept dense: `self.pos[: self.count]` are exactly the live projectiles.
+    Every projectile has a time-to-live, after which it expires. If the pool is full,
+    firing replaces the projectile that would have expired first, so memory stays
+    bounded under sustained fire.
+    """
+
+    def __init__(
+        self,
+        capacity: int = PROJECTILE_POOL_SIZE,
+        lifetime: float = PROJECTILE_LIFETIME,
+    ):
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        # Positions before the last step, for render interpolation
+        self.prev_pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.ttl = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.intp)
+        self.color_index = np.zeros(capacity, dtype=np.intp)
+
+        self.colors: list[Color] = []
+        self._color_indices: dict[tuple[int, int, int, int], int] = {}
+        self._next_owner_id = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get_color_index(self, color: Color) -> int:
+        key = tuple(Color(color))
+        if key not in self._color_indices:
+            self._color_indices[key] = len(self.colors)
+            self.colors.append(Color(color))
+        return self._color_indices[key]
+
+    def attach(self, ship: "Ship"):
+        """
+        Make `ship` fire into this pool, giving it a fresh owner-id.
+        Projectiles the ship has already fired are moved into the pool.
+        """
+        ship.projectile_pool = self
+        ship.owner_id = self._next_owner_id
+        ship.projectile_color = self.get_color_index(ship.color)
+        self._next_owner_id += 1
+
+        for projectile in ship.projectiles:
+            self.spawn(
+                projectile.pos, projectile.vel, ship.projectile_color, ship.owner_id
+            )
+        ship.projectiles.clear()
+
+    def spawn(self, pos: Vector2, vel: Vector2, color_index: int, owner: int):
+        if self.count < self.capacity:
+            row = self.count
+            self.count += 1
+        else:
+            row = int(np.argmin(self.ttl))
+        self.pos[row] = (pos.x, pos.y)
+        self.prev_pos[row] = self.pos[row]
+        self.vel[row] = (vel.x, vel.y)
+        self.ttl[row] = self.lifetime
+        self.owner[row] = owner
+        self.color_index[row] = color_index
+
+    def spawn_many(
+        self,
+        pos: np.ndarray,
+        vel: np.ndarray,
+        color_index: np.ndarray,
+        owner: np.ndarray,
+    ):
+        """Like calling `spawn` for every row of `pos` (shape (n, 2)) and the others."""
+        if len(pos) > self.capacity:
+            # Of more projectiles than fit at all, the last ones would survive
+            pos, vel = pos[-self.capacity :], vel[-self.capacity :]
+            color_index, owner = color_index[-self.capacity :], owner[-self.capacity :]
+        n = len(pos)
+        if n == 0:
+            return
+        old_count = self.count
+        free = min(n, self.capacity - old_count)
+        rows = np.arange(old_count, old_count + free)
+        self.count += free
+        if free < n:
+            # Replace the projectiles that would have expired first
+            replaced = np.argpartition(self.ttl[:old_count], n - free - 1)
+            rows = np.concatenate([rows, replaced[: n - free]])
+        self.pos[rows] = pos
+        self.prev_pos[rows] = pos
+        self.vel[rows] = vel
+        self.ttl[rows] = self.lifetime
+        self.owner[rows] = owner
+        self.color_index[rows] = color_index
+
+    def remove(self, indices: np.ndarray):
+        """Removes the projectiles at `indices`, compacting the remaining ones in one go."""
+        if len(indices) == 0:
+            return
+        n = self.count
+        keep = np.ones(n, dtype=bool)
+        keep[indices] = False
+        remaining = int(np.count_nonzero(keep))
+        for array in [
+            self.pos,
+            self.prev_pos,
+            self.vel,
+            self.ttl,
+            self.owner,
+            self.color_index,
+        ]:
+            array[:remaining] = array[:n][keep]
+        self.count = remaining
+
+    def save_previous(self):
+        self.prev_pos[: self.count] = self.pos[: self.count]
+
+    def interpolate(self, alpha: float) -> np.ndarray:
+        """See BodyArrays.interpolate."""
+        n = self.count
+        current = self.pos[:n].copy()
+        self.pos[:n] = self.prev_pos[:n] + alpha * (current - self.prev_pos[:n])
+        return current
+
+    def restore_positions(self, current: np.ndarray):
+        self.pos[: len(current)] = current
+
+    def step(self, dt: float):
+        n = self.count
+        self.pos[:n] += dt * self.vel[:n]
+        self.ttl[:n] -= dt
+        self.remove(np.flatnonzero(self.ttl[:n] <= 0))
+
+    def count_owned_by(self, owner: int) -> int:
+        return int(np.count_nonzero(self.owner[: self.count] == owner))
+
+    def draw(self, camera: Camera):
+        n = self.count
+        top_left, bottom_right = camera.get_world_rect()
+        pos = self.pos[:n]
+        visible = np.flatnonzero(
+            (top_left.x - _TIP_LENGTH <= pos[:, 0])
+            & (pos[:, 0] <= bottom_right.x + _TIP_LENGTH)
+            & (top_left.y - _TIP_LENGTH <= pos[:, 1])
+            & (pos[:, 1] <= bottom_right.y + _TIP_LENGTH)
+        )
+        pos = pos[visible]
+
+        # Same triangle as Bullet.draw, for all visible projectiles at once
+        vel = self.vel[visible]
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        forward = np.where(
+            speed[:, None] > 0, vel / np.maximum(speed, 1e-12)[:, None], (1.0, 0.0)
+        )
+        fx, fy = forward[:, 0], forward[:, 1]
+        tip = pos + _TIP_LENGTH * forward
+        back_left = pos + _BACK_LENGTH * np.stack(
+            [_BACK_COS * fx - _BACK_SIN * fy, _BACK_SIN * fx + _BACK_COS * fy], axis=1
+        )
+        back_right = pos + _BACK_LENGTH * np.stack(
+            [_BACK_COS * fx + _BACK_SIN * fy, -_BACK_SIN * fx + _BACK_COS * fy], axis=1
+        )
+
+        camera.draw_polygons(
+            [self.colors[i] for i in self.color_index[visible].tolist()],
+            np.stack([tip, back_left, back_right], axis=1),
+        )
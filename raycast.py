@@ -0,0 +1,95 @@
+"""
+Batched raycasts against the disks of a Universe (see `Universe.raycast`).
+"""
+
+import numpy as np
+from physics import segment_disk_toi
+from spatial_hash import DiskGrid, BRUTE_FORCE_PAIRS
+
+# Kinds of things a ray can hit
+NOTHING = -1
+PLANET = 0
+ASTEROID = 1
+ENEMY_SHIP = 2
+PLAYER_SHIP = 3
+ALL_KINDS = (PLANET, ASTEROID, ENEMY_SHIP, PLAYER_SHIP)
+
+
+class RayHits:
+    """
+    Result of `cast_rays`: what every ray hit first.
+    Rays that hit nothing have distance inf, kind NOTHING and index -1.
+    """
+
+    def __init__(self, distance: np.ndarray, kind: np.ndarray, index: np.ndarray):
+        """
+        Args:
+            distance (np.ndarray): Shape (n,), from the ray's origin to the hit. 0 if
+            the origin lies inside the disk.
+            kind (np.ndarray): Shape (n,), e.g. PLANET.
+            index (np.ndarray): Shape (n,), into the Universe's list of that kind
+            (e.g. `planets`). Always 0 for PLAYER_SHIP.
+        """
+        self.distance = distance
+        self.kind = kind
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+
+def cast_rays(
+    origins: np.ndarray,
+    directions: np.ndarray,
+    max_distances: np.ndarray | float,
+    disk_pos: np.ndarray,
+    disk_radius: np.ndarray,
+    disk_kinds: np.ndarray,
+    disk_indices: np.ndarray,
+    grid: DiskGrid,
+) -> RayHits:
+    """
+    Casts all rays at once against the disks. For many rays and disks, `grid` is built
+    over the disks, and only the disks in the cells along each ray are tested. The
+    cost then grows with the rays' length in cells and the disks in those cells, not
+    with the total number of disks.
+
+    Args:
+        origins (np.ndarray): Shape (n, 2).
+        directions (np.ndarray): Shape (n, 2), need not be normalized. Rays without
+        a direction only hit disks their origin lies inside of.
+        max_distances (np.ndarray | float): Shape (n,), or one for all rays. Must be
+        finite.
+        disk_pos (np.ndarray): Shape (d, 2).
+        disk_radius (np.ndarray): Shape (d,).
+        disk_kinds (np.ndarray): Shape (d,), the kind of every disk.
+        disk_indices (np.ndarray): Shape (d,), the index (see RayHits) of every disk.
+    """
+    n, d = len(origins), len(disk_radius)
+    max_distances = np.broadcast_to(max_distances, n)
+    hits = RayHits(np.full(n, np.inf), np.full(n, NOTHING), np.full(n, -1))
+    if n == 0 or d == 0:
+        return hits
+
+    length = np.hypot(directions[:, 0], directions[:, 1])
+    scale = np.divide(max_distances, length, out=np.zeros(n), where=length > 0)
+    ends = origins + directions * scale[:, None]
+    if n * d <= BRUTE_FORCE_PAIRS:
+        toi = segment_disk_toi(
+            np.repeat(origins, d, axis=0),
+            np.repeat(ends, d, axis=0),
+            np.tile(disk_pos, (n, 1)),
+            np.tile(disk_radius, n),
+        ).reshape(n, d)
+        # argmin picks the lowest index on ties, like DiskGrid.first_segment_hit
+        first = toi.argmin(axis=1)
+        toi = toi[np.arange(n), first]
+        first[np.isinf(toi)] = -1
+    else:
+        grid.build(disk_pos, disk_radius)
+        first, toi = grid.first_segment_hit(origins, ends)
+    hit = np.flatnonzero(first >= 0)
+    hits.distance[hit] = toi[hit] * max_distances[hit]
+    hits.kind[hit] = disk_kinds[first[hit]]
+    hits.index[hit] = disk_indices[first[hit]]
+    return hits
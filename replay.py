@@ -0,0 +1,175 @@
+"""
+Recording and replaying of games.
+
+A recording holds everything needed to re-simulate a game exactly: the scenario
+(seed and entity counts), and the dt and player inputs of every tick. Ticks are
+stored as a single byte of input-flags, followed by a float64 only when dt changed.
+"""
+
+import struct
+from typing import Iterator
+from ship import Ship
+from scenario import build_universe
+from universe import Universe
+from config import INTEGRATOR
+
+MAGIC = b"SGRP"
+VERSION = 1
+
+# magic, version, flags, scenario seed, asteroid count, enemy count, tick count
+_HEADER = struct.Struct("<4sBBQIII")
+_DT = struct.Struct("<d")
+
+# Header flags
+FLAG_ARRAY_PHYSICS = 1
+FLAG_GRAVITY_FIELD = 2
+FLAG_LEAPFROG = 4  # Otherwise, the Euler integrator
+FLAG_SECTOR_LOD = 8
+
+# Bits of a tick's input-byte
+INPUT_ROT_LEFT = 1
+INPUT_ROT_RIGHT = 2
+INPUT_FORWARD = 4
+INPUT_BACKWARD = 8
+INPUT_SHOOT = 16
+_NEW_DT = 128  # A new dt follows this byte
+
+
+def get_input_bits(ship: Ship, shoot: bool) -> int:
+    bits = INPUT_SHOOT if shoot else 0
+    if ship.thruster_rot_left:
+        bits |= INPUT_ROT_LEFT
+    if ship.thruster_rot_right:
+        bits |= INPUT_ROT_RIGHT
+    if ship.thruster_forward:
+        bits |= INPUT_FORWARD
+    if ship.thruster_backward:
+        bits |= INPUT_BACKWARD
+    return bits
+
+
+def apply_input_bits(ship: Ship, bits: int):
+    """Sets the thrusters of `ship` according to `bits`, and shoots if requested."""
+    ship.thruster_rot_left = bool(bits & INPUT_ROT_LEFT)
+    ship.thruster_rot_right = bool(bits & INPUT_ROT_RIGHT)
+    ship.thruster_forward = bool(bits & INPUT_FORWARD)
+    ship.thruster_backward = bool(bits & INPUT_BACKWARD)
+    if bits & INPUT_SHOOT:
+        ship.shoot()
+
+
+class Recording:
+    """The scenario of a game, plus the dt and player-inputs of all its ticks."""
+
+    def __init__(
+        self,
+        seed: int,
+        asteroid_count: int,
+        enemy_count: int,
+        array_physics: bool = True,
+        gravity_field: bool = False,
+        integrator: str = INTEGRATOR,
+        sector_lod: bool = False,
+    ):
+        """Args are the same as for `scenario.build_universe`."""
+        self.seed = seed
+        self.asteroid_count = asteroid_count
+        self.enemy_count = enemy_count
+        self.array_physics = array_physics
+        self.gravity_field = gravity_field
+        self.integrator = integrator
+        self.sector_lod = sector_lod
+        self.tick_count = 0
+        self.data = bytearray()
+        self._last_dt: float | None = None
+
+    def build_universe(self, headless: bool = False) -> Universe:
+        """Args are the same as for Universe."""
+        return build_universe(
+            asteroid_count=self.asteroid_count,
+            enemy_count=self.enemy_count,
+            seed=self.seed,
+            array_physics=self.array_physics,
+            gravity_field=self.gravity_field,
+            integrator=self.integrator,
+            sector_lod=self.sector_lod,
+            headless=headless,
+        )
+
+    def record_tick(self, dt: float, bits: int):
+        """Call once per Universe.step, with the inputs applied right before it."""
+        if dt != self._last_dt:
+            self.data.append(bits | _NEW_DT)
+            self.data += _DT.pack(dt)
+            self._last_dt = dt
+        else:
+            self.data.append(bits)
+        self.tick_count += 1
+
+    def ticks(self) -> Iterator[tuple[float, int]]:
+        """Yields (dt, input-bits) for every recorded tick."""
+        data = self.data
+        dt = 0.0
+        i = 0
+        while i < len(data):
+            bits = data[i]
+            i += 1
+            if bits & _NEW_DT:
+                (dt,) = _DT.unpack_from(data, i)
+                i += _DT.size
+            yield dt, bits & ~_NEW_DT
+
+    def save(self, path: str):
+        flags = FLAG_ARRAY_PHYSICS if self.array_physics else 0
+        if self.gravity_field:
+            flags |= FLAG_GRAVITY_FIELD
+        if self.integrator == "leapfrog":
+            flags |= FLAG_LEAPFROG
+        if self.sector_lod:
+            flags |= FLAG_SECTOR_LOD
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            flags,
+            self.seed,
+            self.asteroid_count,
+            self.enemy_count,
+            self.tick_count,
+        )
+        with open(path, "wb") as file:
+            file.write(header)
+            file.write(self.data)
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, "rb") as file:
+            raw = file.read()
+        magic, version, flags, seed, asteroid_count, enemy_count, tick_count = (
+            _HEADER.unpack_from(raw)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        if version != VERSION:
+            raise ValueError(f"Unsupported recording version {version} in {path}")
+
+        recording = cls(
+            seed,
+            asteroid_count,
+            enemy_count,
+            bool(flags & FLAG_ARRAY_PHYSICS),
+            bool(flags & FLAG_GRAVITY_FIELD),
+            "leapfrog" if flags & FLAG_LEAPFROG else "euler",
+            bool(flags & FLAG_SECTOR_LOD),
+        )
+        recording.data = bytearray(raw[_HEADER.size :])
+        recording.tick_count = tick_count
+        return recording
+
+
+def play(recording: Recording) -> Universe:
+    """Re-simulates `recording` without rendering, as fast as possible."""
+    universe = recording.build_universe(headless=True)
+    for dt, bits in recording.ticks():
+        apply_input_bits(universe.player_ship, bits)
+        universe.step(dt)
+    return universe
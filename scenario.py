@@ -0,0 +1,78 @@
+import os
+import random
+from pygame import Color
+from config import WORLD_WIDTH, WORLD_HEIGHT, INTEGRATOR
+from universe import Universe
+from level import Level, BULLET_ENEMY, ROCKET_ENEMY
+
+# The fixed part of the default map: its size, planets and areas
+DEFAULT_LEVEL_PATH = os.path.join(os.path.dirname(__file__), "levels", "default.txt")
+
+
+def default_level(
+    asteroid_count: int,
+    enemy_count: int,
+    rng: random.Random,
+    extra_planet_count: int = 0,
+) -> Level:
+    """
+    The default map: everything in levels/default.txt, plus randomly placed
+    asteroids and enemies.
+
+    Args:
+        extra_planet_count (int): Randomly placed planets on top of the fixed ones.
+    """
+    fixed = Level.load(DEFAULT_LEVEL_PATH)
+
+    asteroids = fixed.asteroids.tolist()
+    for _ in range(asteroid_count):
+        x, y = rng.uniform(0, WORLD_WIDTH), rng.uniform(0, WORLD_HEIGHT)
+        vx, vy = rng.uniform(0, WORLD_WIDTH), rng.uniform(0, WORLD_HEIGHT)
+        radius = rng.uniform(40, 120)
+        asteroids.append((x, y, vx, vy, 1, radius))
+
+    enemies = fixed.enemies.tolist()
+    for _ in range(enemy_count):
+        x, y = rng.randint(0, WORLD_WIDTH), rng.randint(0, WORLD_HEIGHT)
+        kind = BULLET_ENEMY if rng.random() > 0.5 else ROCKET_ENEMY
+        enemies.append((kind, x, y, 0, 0))
+
+    # Drawn last, so that they don't change where everything else is placed
+    planets = fixed.planets.tolist()
+    for _ in range(extra_planet_count):
+        x, y = rng.uniform(0, WORLD_WIDTH), rng.uniform(0, WORLD_HEIGHT)
+        radius = rng.uniform(100, 400)
+        planets.append((x, y, 1, radius, tuple(Color("royalblue"))))
+
+    return Level(fixed.size, fixed.player_pos, planets, asteroids, fixed.areas, enemies)
+
+
+def build_universe(
+    asteroid_count: int = 5,
+    enemy_count: int = 16,
+    seed: int | None = None,
+    array_physics: bool = True,
+    gravity_field: bool = False,
+    integrator: str = INTEGRATOR,
+    sector_lod: bool = False,
+    headless: bool = False,
+    extra_planet_count: int = 0,
+) -> Universe:
+    """
+    Builds the default map, see `default_level`.
+    Does not touch the display, so this can be used headlessly.
+
+    Args:
+        seed (int | None): Seed for the random placement, and for the Universe's own rng.
+        If None, every call differs.
+    """
+    rng = random.Random(seed)
+    level = default_level(asteroid_count, enemy_count, rng, extra_planet_count)
+    return level.build_universe(
+        array_physics=array_physics,
+        seed=rng.getrandbits(64),
+        gravity_field=gravity_field,
+        integrator=integrator,
+        sector_lod=sector_lod,
+        headless=headless,
+    )
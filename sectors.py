@@ -0,0 +1,126 @@
+"""
+Level of detail for the simulation, by sectors of the world.
+
+The world is divided into square sectors. Everything in the sectors around the player
+is simulated every tick, with full collisions. Bodies in distant sectors only move
+every few ticks, by all the time they've fallen behind at once, and only bounce off
+planets. Distant sectors take turns, so that every tick moves about the same number of
+bodies. When a sector becomes active again, its bodies catch up on the time they're
+behind in a single step, so no simulated time is lost.
+
+Distant bodies that are slow, don't thrust and are hardly pulled by any planet fall
+asleep after a while: they stop moving until they thrust or their sector is active.
+Then they catch up on all the time they slept through, like any other distant body.
+"""
+
+from typing import Callable
+import numpy as np
+from pygame.math import Vector2
+from body_arrays import BodyArrays
+from profiler import profiler
+from config import (
+    SECTOR_SIZE,
+    ACTIVE_SECTOR_RADIUS,
+    DISTANT_STEP_INTERVAL,
+    SLEEP_SPEED,
+    SLEEP_DELAY,
+    SLEEP_ACCELERATION,
+)
+
+
+class SectorLod:
+    """
+    Decides which bodies of `arrays` move during a tick, and by how much time.
+    Call `update` once per tick, before the bodies are integrated.
+    """
+
+    def __init__(
+        self,
+        arrays: BodyArrays,
+        acceleration: Callable[[np.ndarray], np.ndarray],
+        sector_size: float = SECTOR_SIZE,
+        active_radius: int = ACTIVE_SECTOR_RADIUS,
+        interval: int = DISTANT_STEP_INTERVAL,
+        sleep_speed: float = SLEEP_SPEED,
+        sleep_delay: float = SLEEP_DELAY,
+        sleep_acceleration: float = SLEEP_ACCELERATION,
+    ):
+        """
+        Args:
+            acceleration (Callable): Returns the planets' pull at points (shape (n, 2)),
+            like `Universe.planet_acceleration`.
+            active_radius (int): Sectors at most this many sectors away from the
+            player's (horizontally and vertically) are active.
+            interval (int): Distant bodies move once every `interval` ticks.
+            sleep_speed (float): Distant bodies slower than this, without thrust, are
+            idle, unless planets accelerate them by more than `sleep_acceleration`.
+            After being idle for `sleep_delay` seconds, they fall asleep.
+        """
+        self.arrays = arrays
+        self.acceleration = acceleration
+        self.sector_size = sector_size
+        self.active_radius = active_radius
+        self.interval = interval
+        self.sleep_speed = sleep_speed
+        self.sleep_delay = sleep_delay
+        self.sleep_acceleration = sleep_acceleration
+        self.tick = 0
+
+        # Results of the last `update`, all indexed by row of `arrays`
+        self.active = np.zeros(0, dtype=bool)  # In an active sector
+        self.asleep = np.zeros(0, dtype=bool)
+        self.rows = np.zeros(0, dtype=np.intp)  # The rows moving during this tick
+        self.step_dt = np.zeros(0)  # How much time each of `rows` moves by
+
+    def get_sectors(self, points: np.ndarray) -> np.ndarray:
+        """Returns the (column, row) of the sector of every point (shape (n, 2))."""
+        return np.floor(points / self.sector_size).astype(np.intp)
+
+    def update(self, dt: float, focus: Vector2):
+        """Advances everything's lag by `dt`, and picks the bodies to move this tick."""
+        arrays, n = self.arrays, self.arrays.count
+        sectors = self.get_sectors(arrays.pos[:n])
+        focus_sector = self.get_sectors(np.array([focus.x, focus.y]))
+        active = (np.abs(sectors - focus_sector) <= self.active_radius).all(axis=1)
+
+        # Active or thrusting bodies wake up, and so do fast ones
+        lag, idle_time = arrays.lag[:n], arrays.idle_time[:n]
+        vel = arrays.vel[:n]
+        thrusting = (arrays.force[:n] != 0).any(axis=1)
+        slow = vel[:, 0] ** 2 + vel[:, 1] ** 2 < self.sleep_speed**2
+        idle = ~(active | thrusting) & slow
+        # Bodies in a gravity well would start falling, so they can't sleep. Planets
+        # don't move, so this needn't be checked again for the ones already asleep
+        falling_asleep = np.flatnonzero(idle & (idle_time < self.sleep_delay))
+        if len(falling_asleep) > 0:
+            pull = self.acceleration(arrays.pos[falling_asleep])
+            pulled = pull[:, 0] ** 2 + pull[:, 1] ** 2 >= self.sleep_acceleration**2
+            idle[falling_asleep[pulled]] = False
+        idle_time[~idle] = 0
+        asleep = idle_time >= self.sleep_delay
+        # Sleeping bodies keep falling behind, and catch up once they wake
+        lag += dt
+
+        # Distant sectors take turns, sectors on the same diagonal moving together
+        diagonal = sectors[:, 0] + sectors[:, 1]
+        turn = diagonal % self.interval == self.tick % self.interval
+        # Bodies that changed sectors might have missed their turn
+        overdue = lag >= self.interval * dt * (1 - 1e-9)
+        due = (active | turn | overdue) & ~asleep
+        self.rows = np.flatnonzero(due)
+        self.step_dt = lag[self.rows]
+        lag[self.rows] = 0
+
+        idle_time[self.rows] += np.where(idle[self.rows], self.step_dt, 0)
+
+        self.active, self.asleep = active, asleep
+        self.tick += 1
+        profiler.count("distant bodies moved", len(self.rows) - int(active.sum()))
+        profiler.count("sleeping bodies", int(asleep.sum()))
+
+    def distant_rows(self) -> np.ndarray:
+        """The rows moving during this tick, outside of the active sectors."""
+        return self.rows[~self.active[self.rows]]
+
+    def active_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.active)
@@ -6,7 +6,13 @@ from physics import Disk, Bullet, Rocket
 from camera import Camera
 from enum import Enum
 from enemy_info import ENEMY_SHOOT_RANGE
+from sprites import ship_sprites
 import random
+from typing import TYPE_CHECKING, Callable
+import numpy as np
+
+if TYPE_CHECKING:
+    from projectiles import ProjectilePool
 
 
 # TODO: Move constant somewhere else
@@ -27,6 +33,11 @@ class Ship(Disk):
         self.REFUEL_RATE = 0.2
         self.MAX_health = 200.0
         self.projectiles: list[Bullet] = []
+        # Set by ProjectilePool.attach. If set, projectiles are fired into
+        # the pool instead of into self.projectiles.
+        self.projectile_pool: ProjectilePool | None = None
+        self.owner_id = -1
+        self.projectile_color = -1
         self.gun_cooldown = 3
         self.has_trophy = True
 
@@ -53,10 +64,18 @@ class Ship(Disk):
             forward = self.get_faced_direction()
             bullet_pos = self.pos + forward * self.radius * GUNBARREL_LENGTH
             bullet_vel = self.vel + forward * BULLET_SPEED
-            self.projectiles.append(Bullet(bullet_pos, bullet_vel, self.color))
+            self.launch_projectile(bullet_pos, bullet_vel, Bullet)
             self.gun_cooldown = 0.25
             self.ammo -= 1
 
+    def launch_projectile(self, pos: Vector2, vel: Vector2, kind: type[Bullet]):
+        if self.projectile_pool is None:
+            self.projectiles.append(kind(pos, vel, self.color))
+        else:
+            # TODO: The pool doesn't distinguish kinds of projectiles yet,
+            # which is fine as long as Rockets are just Bullets.
+            self.projectile_pool.spawn(pos, vel, self.projectile_color, self.owner_id)
+
     def step(self, dt: float):
         if self.fuel > 0:
             if self.thruster_rot_left:
@@ -82,7 +101,14 @@ class Ship(Disk):
         self.gun_cooldown = max(0, self.gun_cooldown - dt)
 
     def draw(self, camera: Camera):
-        forward = self.get_faced_direction()
+        if not ship_sprites.draw(camera, self):
+            self.draw_vector(camera, self.pos, self.get_faced_direction())
+
+        for projectile in self.projectiles:
+            projectile.draw(camera)
+
+    def draw_vector(self, camera: Camera, pos: Vector2, forward: Vector2):
+        """Draws the ship out of polygons, at `pos`, facing `forward`."""
         right = pygame.math.Vector2(-forward.y, forward.x)
         left = -right
         backward = -forward
@@ -94,7 +120,7 @@ class Ship(Disk):
 
         # Helper function for drawing polygons relative to the ship-position
         def drawy(color: Color, points: list[Vector2]):
-            camera.draw_polygon(color, [self.pos + self.radius * p for p in points])
+            camera.draw_polygon(color, [pos + self.radius * p for p in points])
 
         # TODO: Especially the backward-thruster is super ugly
         # thruster_backward (active)
@@ -104,8 +130,8 @@ class Ship(Disk):
         # "For his neutral special, he wields a gun"
         camera.draw_line(
             Color("blue"),
-            self.pos,
-            self.pos + forward * self.radius * GUNBARREL_LENGTH,
+            pos,
+            pos + forward * self.radius * GUNBARREL_LENGTH,
             GUNBARREL_WIDTH * self.radius,
         )
 
@@ -173,10 +199,8 @@ class Ship(Disk):
             ],
         )
 
-        super().draw(camera)  # Draw circular body ("hitbox")
-
-        for projectile in self.projectiles:
-            projectile.draw(camera)
+        # Draw circular body ("hitbox")
+        camera.draw_circle(self.color, pos, self.radius)
 
     # TODO: Either revive or delete this code at some point
     # If reviving, add `self.load_image('ship_sprite.png')` back
@@ -221,6 +245,10 @@ class BulletEnemy(Ship):
         color: Color = Color("purple"),
     ):
         super().__init__(pos, vel, 1, 8, color)
+        # Replaced by the Universe's own rng, to make simulations reproducible
+        self.rng = random.Random()
+        # Set by the Universe, see Universe.line_of_sight
+        self.line_of_sight: Callable[..., np.ndarray] | None = None
         self.time_until_next_shot = 0
         self.action_timer = 6
         self.health = 100
@@ -228,7 +256,6 @@ class BulletEnemy(Ship):
         self.target_ship = target_ship
         self.thrust = 100
         self.shoot_cooldown = shoot_cooldown
-        self.projectiles: list[Bullet] = []
 
     def step(self, dt: float):
         # TODO: Enemies should be affected by gravity and collisions, this
@@ -237,7 +264,7 @@ class BulletEnemy(Ship):
 
         self.action_timer -= dt
         if self.action_timer <= 0:
-            self.current_action = random.choice(list(BulletEnemy.Action))
+            self.current_action = self.rng.choice(list(BulletEnemy.Action))
             self.action_timer = 6
 
         delta_target_ship = self.target_ship.pos - self.pos
@@ -249,7 +276,9 @@ class BulletEnemy(Ship):
             case BulletEnemy.Action.accelerate_randomly:
                 # TODO: Almost certainly, these accelerations will cancel each other out,
                 # and the ship will not experience significant change in speed
-                force_direction = Vector2(random.uniform(-1, 1), random.uniform(-1, 1))
+                force_direction = Vector2(
+                    self.rng.uniform(-1, 1), self.rng.uniform(-1, 1)
+                )
             case BulletEnemy.Action.decelerate:
                 force_direction = -self.vel
         force = force_direction * self.thrust / force_direction.magnitude()
@@ -264,9 +293,21 @@ class BulletEnemy(Ship):
             delta_target_ship.magnitude_squared() < ENEMY_SHOOT_RANGE**2
             and self.time_until_next_shot <= 0
         ):
-            self.shoot()
+            if self.can_see_target():
+                self.shoot()
             self.time_until_next_shot = self.shoot_cooldown
 
+    def can_see_target(self) -> bool:
+        if self.line_of_sight is None:
+            return True
+        target = self.target_ship.pos
+        return bool(
+            self.line_of_sight(
+                np.array([[self.pos.x, self.pos.y]]), np.array([[target.x, target.y]])
+            )[0]
+        )
+
+
 class RocketEnemy(BulletEnemy):
     """An enemy ship shooting rockets, targeting a specific other ship."""
 
@@ -285,7 +326,7 @@ class RocketEnemy(BulletEnemy):
             forward = self.get_faced_direction()
             bullet_pos = self.pos + forward * self.radius * GUNBARREL_LENGTH
             bullet_vel = self.vel + forward * BULLET_SPEED
-            self.projectiles.append(Rocket(bullet_pos, bullet_vel, self.color))
+            self.launch_projectile(bullet_pos, bullet_vel, Rocket)
             self.gun_cooldown = 0.25
             self.ammo -= 1
 
@@ -0,0 +1,229 @@
+import numpy as np
+from physics import disk_disk_toi, segment_disk_toi
+from config import GRID_SIZE
+
+# Up to this many (query, disk)-pairs, testing all of them beats looking up cells
+BRUTE_FORCE_PAIRS = 4096
+
+
+class DiskGrid:
+    """
+    An array-based uniform grid over disks, for batched queries.
+
+    It stores disks by index into the position- and radius-arrays it was built from,
+    and answers queries for whole arrays of points at once.
+    Every (cell, disk)-entry is kept in a sorted key-array, so that lookups are a
+    single `np.searchsorted`. That index is only built once a query is large enough
+    to need it, below BRUTE_FORCE_PAIRS every disk is a candidate.
+    """
+
+    def __init__(self, cell_size: float = GRID_SIZE):
+        self.cell_size = cell_size
+        self.disk_pos = np.zeros((0, 2))
+        self.disk_prev_pos = np.zeros((0, 2))
+        self.disk_radius = np.zeros(0)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._disks = np.zeros(0, dtype=np.intp)
+        self._indexed = True
+
+    def _cell_keys(self, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        # Pack both (possibly negative) cell-coordinates into a single int64
+        return (cx.astype(np.int64) << 32) | (cy.astype(np.int64) & 0xFFFFFFFF)
+
+    def _box_cells(
+        self, box_min: np.ndarray, box_max: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (box_indices, cell_keys), one entry per cell touched by every
+        axis-aligned box, grouped by box.
+        """
+        cs = self.cell_size
+        min_cell = np.floor(box_min / cs).astype(np.int64)
+        max_cell = np.floor(box_max / cs).astype(np.int64)
+        extent = max_cell - min_cell + 1
+        counts = extent[:, 0] * extent[:, 1]
+
+        boxes = np.repeat(np.arange(len(box_min)), counts)
+        local = np.arange(len(boxes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = extent[boxes, 0]
+        cx = min_cell[boxes, 0] + local % width
+        cy = min_cell[boxes, 1] + local // width
+        return boxes, self._cell_keys(cx, cy)
+
+    def build(
+        self,
+        disk_pos: np.ndarray,
+        disk_radius: np.ndarray,
+        disk_prev_pos: np.ndarray | None = None,
+    ):
+        """
+        Args:
+            disk_pos (np.ndarray): Shape (d, 2), centers of the disks.
+            disk_radius (np.ndarray): Shape (d,), radii of the disks.
+            disk_prev_pos (np.ndarray | None): Shape (d, 2), centers of the disks
+            before the last step, for the swept queries. If None, disks didn't move.
+        """
+        if disk_prev_pos is None:
+            disk_prev_pos = disk_pos
+        self.disk_pos = disk_pos
+        self.disk_prev_pos = disk_prev_pos
+        self.disk_radius = disk_radius
+        self._indexed = False
+
+    def _build_index(self):
+        if self._indexed:
+            return
+        # Every cell the disk touched during the last step
+        r = self.disk_radius[:, None]
+        disks, keys = self._box_cells(
+            np.minimum(self.disk_pos, self.disk_prev_pos) - r,
+            np.maximum(self.disk_pos, self.disk_prev_pos) + r,
+        )
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._disks = disks[order]
+        self._indexed = True
+
+    def candidate_box_pairs(
+        self, box_min: np.ndarray, box_max: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (box_indices, disk_indices) of all disks sharing a cell with each
+        axis-aligned box, without duplicates, sorted by box and then by disk. For
+        few boxes and disks, that's simply every (box, disk)-pair.
+        """
+        b, d = len(box_min), len(self.disk_radius)
+        if b * d <= BRUTE_FORCE_PAIRS:
+            return np.repeat(np.arange(b), d), np.tile(np.arange(d), b)
+        self._build_index()
+        boxes, keys = self._box_cells(box_min, box_max)
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        counts = hi - lo
+
+        box_indices = np.repeat(boxes, counts)
+        local = np.arange(len(box_indices)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        disk_indices = self._disks[np.repeat(lo, counts) + local]
+        # Boxes spanning several cells find some disks more than once
+        pairs = np.unique(box_indices * len(self.disk_radius) + disk_indices)
+        return pairs // len(self.disk_radius), pairs % len(self.disk_radius)
+
+    def first_swept_hit(
+        self, start: np.ndarray, end: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        For points moving from `start` to `end` during the last step (while the disks
+        moved from their previous to their current positions), returns the index of
+        the disk each point touches first, and when (see `physics.segment_disk_toi`).
+        Points touching no disk get index -1 and time inf. Ties go to the lowest index.
+        """
+        point_indices, disk_indices = self.candidate_box_pairs(
+            np.minimum(start, end), np.maximum(start, end)
+        )
+        toi = disk_disk_toi(
+            start[point_indices],
+            end[point_indices],
+            0,
+            self.disk_prev_pos[disk_indices],
+            self.disk_pos[disk_indices],
+            self.disk_radius[disk_indices],
+        )
+        return self._first_hits(len(start), point_indices, disk_indices, toi)
+
+    def _segment_cells(
+        self, start: np.ndarray, end: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (segment_indices, cell_keys), one entry per cell crossed by every line
+        segment, grouped by segment. A cell can appear twice for the same segment.
+        """
+        cs = self.cell_size
+        start_cell = np.floor(start / cs).astype(np.int64)
+        crossings = np.abs(np.floor(end / cs).astype(np.int64) - start_cell)
+
+        # Where each segment crosses the cell borders, as a fraction of the way
+        fractions = [np.zeros(len(start)), np.ones(len(start))]
+        segments = [np.arange(len(start))] * 2
+        for axis in range(2):
+            counts = crossings[:, axis]
+            crossing = np.repeat(np.arange(len(start)), counts)
+            k = np.arange(len(crossing)) - np.repeat(np.cumsum(counts) - counts, counts)
+            delta = end[crossing, axis] - start[crossing, axis]
+            # The k-th border after the start cell, in the direction of the segment
+            border = start_cell[crossing, axis] + np.where(delta > 0, k + 1, -k)
+            fractions.append((border * cs - start[crossing, axis]) / delta)
+            segments.append(crossing)
+        fractions, segments = np.concatenate(fractions), np.concatenate(segments)
+        order = np.lexsort((fractions, segments))
+        fractions, segments = fractions[order], segments[order]
+
+        # Every piece between two consecutive crossings lies within a single cell
+        piece = np.flatnonzero(segments[1:] == segments[:-1])
+        segments = segments[piece]
+        middle = (fractions[piece] + fractions[piece + 1]) / 2
+        points = start[segments] + middle[:, None] * (end[segments] - start[segments])
+        cells = np.floor(points / cs).astype(np.int64)
+        return segments, self._cell_keys(cells[:, 0], cells[:, 1])
+
+    def candidate_segment_pairs(
+        self, start: np.ndarray, end: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Like `candidate_box_pairs`, but for line segments from `start` to `end`. Only
+        looks up the cells each segment actually crosses, rather than its whole
+        bounding box, so long diagonal segments stay cheap.
+        """
+        self._build_index()
+        segments, keys = self._segment_cells(start, end)
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        counts = hi - lo
+
+        segment_indices = np.repeat(segments, counts)
+        local = np.arange(len(segment_indices)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        disk_indices = self._disks[np.repeat(lo, counts) + local]
+        pairs = np.unique(segment_indices * len(self.disk_radius) + disk_indices)
+        return pairs // len(self.disk_radius), pairs % len(self.disk_radius)
+
+    def first_segment_hit(
+        self, start: np.ndarray, end: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        For line segments from `start` to `end`, returns the index of the disk (at
+        its current position) each segment touches first, and the fraction of the way
+        at which it does (see `physics.segment_disk_toi`). Segments touching no disk
+        get index -1 and fraction inf. Ties go to the lowest index.
+        """
+        segment_indices, disk_indices = self.candidate_segment_pairs(start, end)
+        toi = segment_disk_toi(
+            start[segment_indices],
+            end[segment_indices],
+            self.disk_pos[disk_indices],
+            self.disk_radius[disk_indices],
+        )
+        return self._first_hits(len(start), segment_indices, disk_indices, toi)
+
+    def _first_hits(
+        self,
+        count: int,
+        point_indices: np.ndarray,
+        disk_indices: np.ndarray,
+        toi: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The earliest of the (point, disk, toi)-candidates, for each of the points."""
+        hitting = np.isfinite(toi)
+        point_indices, disk_indices = point_indices[hitting], disk_indices[hitting]
+        toi = toi[hitting]
+
+        first_disk = np.full(count, -1, dtype=np.intp)
+        first_toi = np.full(count, np.inf)
+        # Pairs are sorted by disk, so a stable sort by time keeps ties in that order
+        order = np.lexsort((toi, point_indices))
+        points, first = np.unique(point_indices[order], return_index=True)
+        first_disk[points] = disk_indices[order][first]
+        first_toi[points] = toi[order][first]
+        return first_disk, first_toi
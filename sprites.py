@@ -0,0 +1,137 @@
+import math
+import pygame
+import pygame.gfxdraw
+from pygame import Color
+from collections import OrderedDict
+from pygame.math import Vector2
+from camera import Camera
+from profiler import profiler
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ship import Ship
+
+ANGLE_STEPS = 72  # i.e. 5 degrees per step
+ZOOM_STEPS_PER_OCTAVE = 8  # Zoom-buckets are at most ~4.5% apart
+MAX_SPRITE_SIZE = 512  # Ships larger than this on screen are drawn directly
+MAX_DISC_SPRITE_RADIUS = 256  # Discs larger than this on screen are drawn clipped
+# Finer than for ships, so that discs are at most ~1% off their true size
+DISC_ZOOM_STEPS_PER_OCTAVE = 32
+
+# How far a ship's shapes reach from its center, relative to its radius.
+# The gun barrel (GUNBARREL_LENGTH in ship.py) is the farthest part.
+SHIP_EXTENT = 3.5
+
+
+class ShipSpriteCache:
+    """
+    Pre-rendered ship sprites, for quantised angles and zoom-levels.
+
+    Each sprite is rendered once with Ship.draw_vector, and blitted from then on.
+    Sprites are keyed by the ship's color, radius, thruster-state, angle-bucket and
+    zoom-bucket. Beyond `capacity`, the least recently used sprite is dropped.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._sprites: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def _render(self, ship: "Ship", angle_bucket: int, zoom: float) -> pygame.Surface:
+        half_size = math.ceil(SHIP_EXTENT * ship.radius * zoom) + 1
+        surface = pygame.Surface((2 * half_size, 2 * half_size), pygame.SRCALPHA)
+        angle = math.radians(angle_bucket * 360 / ANGLE_STEPS)
+        forward = Vector2(math.cos(angle), math.sin(angle))
+        ship.draw_vector(Camera(Vector2(0, 0), zoom, surface), Vector2(0, 0), forward)
+        return surface
+
+    def draw(self, camera: Camera, ship: "Ship") -> bool:
+        """
+        Draws `ship` from the cache, rendering its sprite first if needed.
+        Returns False (and draws nothing) if the ship is too large on screen for a sprite.
+        """
+        zoom_bucket = round(math.log2(camera.zoom) * ZOOM_STEPS_PER_OCTAVE)
+        zoom = 2 ** (zoom_bucket / ZOOM_STEPS_PER_OCTAVE)
+        if 2 * SHIP_EXTENT * ship.radius * zoom > MAX_SPRITE_SIZE:
+            return False
+
+        angle_bucket = round(ship.angle % 360 * ANGLE_STEPS / 360) % ANGLE_STEPS
+        thrusters = (
+            ship.thruster_rot_left,
+            ship.thruster_rot_right,
+            ship.thruster_forward,
+            ship.thruster_backward,
+        )
+        key = (tuple(ship.color), ship.radius, thrusters, angle_bucket, zoom_bucket)
+
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            profiler.count("ship sprites rendered")
+            sprite = self._render(ship, angle_bucket, zoom)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.capacity:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+
+        camera.draw_sprite(sprite, ship.pos)
+        return True
+
+
+# The cache all ships are drawn from
+ship_sprites = ShipSpriteCache()
+
+
+class DiscSpriteCache:
+    """
+    Pre-rendered anti-aliased discs, for quantised zoom-levels.
+
+    Discs are keyed by color and their on-screen radius at the zoom-bucket, so that
+    zooming smoothly only re-renders them every few frames. Scaling a cached disc
+    instead would cost far more than rendering it anew.
+
+    Discs larger than MAX_DISC_SPRITE_RADIUS on screen are not cached, but drawn
+    with Camera.draw_clipped_circle instead, which only fills their on-screen part.
+    Beyond `capacity`, the least recently used disc is dropped.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._sprites: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def _render(self, color: Color, radius: int) -> pygame.Surface:
+        size = 2 * radius + 2
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.gfxdraw.aacircle(surface, radius + 1, radius + 1, radius, color)
+        pygame.gfxdraw.filled_circle(surface, radius + 1, radius + 1, radius, color)
+        # Run-length encoding makes blitting the (mostly opaque) disc much faster
+        surface.set_alpha(255, pygame.RLEACCEL)
+        return surface
+
+    def draw(self, camera: Camera, color: Color, center: Vector2, radius: float):
+        zoom_bucket = round(math.log2(camera.zoom) * DISC_ZOOM_STEPS_PER_OCTAVE)
+        cradius = int(radius * 2 ** (zoom_bucket / DISC_ZOOM_STEPS_PER_OCTAVE))
+        if cradius > MAX_DISC_SPRITE_RADIUS:
+            camera.draw_clipped_circle(color, center, radius)
+            return
+
+        key = (tuple(color), cradius)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            profiler.count("disc sprites rendered")
+            sprite = self._render(color, cradius)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.capacity:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        camera.draw_sprite(sprite, center)
+
+
+# The cache all planets are drawn from
+planet_sprites = DiscSpriteCache()
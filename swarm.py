@@ -0,0 +1,203 @@
+"""
+Batched AI for all enemy ships of a Universe.
+
+BulletEnemy.step decides, steers and shoots for a single enemy in Python, which limits
+a Universe to a handful of them. EnemySwarm keeps the same state for all enemies in
+arrays instead, and runs the same state machine for all of them at once.
+"""
+
+from typing import Callable
+import numpy as np
+from physics import PhysicalObject
+from ship import BulletEnemy, BULLET_SPEED, GUNBARREL_LENGTH
+from enemy_info import ENEMY_SHOOT_RANGE
+from projectiles import ProjectilePool
+from body_arrays import BodyArrays
+
+ACTIONS = list(BulletEnemy.Action)
+ACCELERATE_TO_PLAYER = ACTIONS.index(BulletEnemy.Action.accelerate_to_player)
+ACCELERATE_RANDOMLY = ACTIONS.index(BulletEnemy.Action.accelerate_randomly)
+DECELERATE = ACTIONS.index(BulletEnemy.Action.decelerate)
+
+ACTION_DURATION = 6  # Seconds until an enemy picks a new action
+GUN_COOLDOWN = 0.25  # Seconds between two shots, see Ship.shoot
+
+
+class EnemySwarm:
+    """
+    The state of every enemy ship (action, timers, cooldowns, ammunition and heading)
+    in arrays, stepped all at once. Behaves like calling BulletEnemy.step on every
+    enemy, except for the order of random numbers.
+
+    Enemies must be bound to `arrays`, and all target the same ship. Their attributes
+    (e.g. `angle`, for drawing) are only updated by `sync`.
+    """
+
+    def __init__(
+        self,
+        arrays: BodyArrays,
+        pool: ProjectilePool,
+        target: PhysicalObject,
+        seed: int,
+        line_of_sight: Callable[[np.ndarray, np.ndarray], np.ndarray] | None = None,
+        capacity: int = 64,
+    ):
+        """
+        Args:
+            line_of_sight (Callable | None): Like `Universe.line_of_sight`. If set,
+            enemies only shoot at a target they can see.
+        """
+        self.arrays = arrays
+        self.line_of_sight = line_of_sight
+        self.pool = pool
+        self.target = target
+        self.rng = np.random.default_rng(seed)
+        self.ships: list[BulletEnemy] = []
+        self.count = 0
+
+        self.rows = np.zeros(capacity, dtype=np.intp)  # Their rows in `arrays`
+        self.action = np.zeros(capacity, dtype=np.intp)
+        self.action_timer = np.zeros(capacity)
+        self.time_until_next_shot = np.zeros(capacity)
+        self.shoot_cooldown = np.zeros(capacity)
+        self.gun_cooldown = np.zeros(capacity)
+        self.ammo = np.zeros(capacity, dtype=np.int64)
+        self.angle = np.zeros(capacity)
+        self.thrust = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.intp)
+        self.color_index = np.zeros(capacity, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _arrays(self) -> list[str]:
+        return [
+            "rows",
+            "action",
+            "action_timer",
+            "time_until_next_shot",
+            "shoot_cooldown",
+            "gun_cooldown",
+            "ammo",
+            "angle",
+            "thrust",
+            "radius",
+            "owner",
+            "color_index",
+        ]
+
+    def _grow(self):
+        for name in self._arrays():
+            array = getattr(self, name)
+            grown = np.zeros(2 * len(array), dtype=array.dtype)
+            grown[: self.count] = array[: self.count]
+            setattr(self, name, grown)
+
+    def add(self, ship: BulletEnemy):
+        """Takes over the AI of `ship`, which must already be bound to `self.arrays`."""
+        if self.count == len(self.rows):
+            self._grow()
+        i = self.count
+        self.action[i] = ACTIONS.index(ship.current_action)
+        self.action_timer[i] = ship.action_timer
+        self.time_until_next_shot[i] = ship.time_until_next_shot
+        self.shoot_cooldown[i] = ship.shoot_cooldown
+        self.gun_cooldown[i] = ship.gun_cooldown
+        self.ammo[i] = ship.ammo
+        self.angle[i] = ship.angle
+        self.thrust[i] = ship.thrust
+        self.radius[i] = ship.radius
+        self.owner[i] = ship.owner_id
+        self.color_index[i] = ship.projectile_color
+        self.ships.append(ship)
+        self.count += 1
+
+    def remove(self, ship: BulletEnemy):
+        """Hands the AI of `ship` back to the ship."""
+        i = self.ships.index(ship)
+        self._sync_row(i)
+        # Shift the following rows down, so they stay in the order enemies were added
+        n = self.count
+        for name in self._arrays():
+            array = getattr(self, name)
+            array[i : n - 1] = array[i + 1 : n]
+        self.ships.pop(i)
+        self.count -= 1
+
+    def _sync_row(self, i: int):
+        ship = self.ships[i]
+        ship.current_action = ACTIONS[self.action[i]]
+        ship.action_timer = float(self.action_timer[i])
+        ship.time_until_next_shot = float(self.time_until_next_shot[i])
+        ship.gun_cooldown = float(self.gun_cooldown[i])
+        ship.ammo = int(self.ammo[i])
+        ship.angle = float(self.angle[i])
+
+    def sync(self):
+        """Writes the state of every enemy back to its BulletEnemy."""
+        for i in range(self.count):
+            self._sync_row(i)
+
+    def step(self, dt: float):
+        """Like BulletEnemy.step, for all enemies."""
+        n = self.count
+        if n == 0:
+            return
+        # Rows in `self.arrays` move whenever a body is removed from it
+        rows = self.rows[:n]
+        rows[:] = [ship.row for ship in self.ships]
+        pos, vel = self.arrays.pos[rows], self.arrays.vel[rows]
+
+        # Pick a new action every ACTION_DURATION seconds
+        timer = self.action_timer[:n]
+        timer -= dt
+        expired = np.flatnonzero(timer <= 0)
+        self.action[expired] = self.rng.integers(0, len(ACTIONS), len(expired))
+        timer[expired] = ACTION_DURATION
+
+        # Steer according to the action
+        action = self.action[:n]
+        target = self.target.pos
+        delta_target = np.array([[target.x, target.y]]) - pos
+        direction = np.where(
+            (action == ACCELERATE_TO_PLAYER)[:, None], delta_target, 0.0
+        )
+        randomly = np.flatnonzero(action == ACCELERATE_RANDOMLY)
+        direction[randomly] = self.rng.uniform(-1, 1, (len(randomly), 2))
+        decelerating = action == DECELERATE
+        direction[decelerating] = -vel[decelerating]
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        # Enemies without any direction (e.g. at rest and decelerating) don't steer
+        scale = np.divide(self.thrust[:n], length, out=np.zeros(n), where=length > 0)
+        self.arrays.force[rows] += direction * scale[:, None]
+
+        # As in Ship.step
+        np.maximum(self.gun_cooldown[:n] - dt, 0, out=self.gun_cooldown[:n])
+        # Radians, although Ship.get_faced_direction takes degrees (as in BulletEnemy)
+        angle = self.angle[:n]
+        angle[:] = np.arctan2(vel[:, 1], vel[:, 0])
+
+        # Shooting
+        self.time_until_next_shot[:n] -= 1
+        distance = np.hypot(delta_target[:, 0], delta_target[:, 1])
+        in_range = distance < ENEMY_SHOOT_RANGE
+        trying = np.flatnonzero(in_range & (self.time_until_next_shot[:n] <= 0))
+        self.time_until_next_shot[trying] = self.shoot_cooldown[trying]
+        shooting = trying[(self.gun_cooldown[trying] <= 0) & (self.ammo[trying] > 0)]
+        if self.line_of_sight is not None and len(shooting) > 0:
+            # Don't waste ammunition on planets and asteroids
+            targets = np.broadcast_to([target.x, target.y], (len(shooting), 2))
+            shooting = shooting[self.line_of_sight(pos[shooting], targets)]
+        self.gun_cooldown[shooting] = GUN_COOLDOWN
+        self.ammo[shooting] -= 1
+
+        radians = np.radians(angle[shooting])
+        forward = np.stack([np.cos(radians), np.sin(radians)], axis=1)
+        self.pool.spawn_many(
+            pos[shooting]
+            + forward * (self.radius[shooting] * GUNBARREL_LENGTH)[:, None],
+            vel[shooting] + forward * BULLET_SPEED,
+            self.color_index[shooting],
+            self.owner[shooting],
+        )
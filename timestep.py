@@ -0,0 +1,40 @@
+from config import TICK_RATE, MAX_TICKS_PER_FRAME
+
+
+class FixedTimestep:
+    """
+    Turns variable frame-times into a whole number of fixed-size simulation ticks.
+
+    Leftover time is carried over to the next frame. `alpha` says how far the
+    rendered frame lies between the last two simulated states, for interpolation.
+    """
+
+    def __init__(
+        self,
+        tick_rate: float = TICK_RATE,
+        max_ticks_per_frame: int = MAX_TICKS_PER_FRAME,
+    ):
+        """
+        Args:
+            tick_rate (float): Simulation ticks per second.
+            max_ticks_per_frame (int): If a frame took longer than this many ticks,
+            the surplus time is dropped, so that one slow frame can't make the
+            simulation fall further and further behind.
+        """
+        self.dt = 1 / tick_rate
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0
+
+    def advance(self, frame_time: float) -> int:
+        """Adds `frame_time` seconds, and returns how many ticks must be simulated now."""
+        self.accumulator += frame_time
+        ticks = int(self.accumulator / self.dt)
+        if ticks > self.max_ticks_per_frame:
+            ticks = self.max_ticks_per_frame
+            self.accumulator = ticks * self.dt
+        self.accumulator -= ticks * self.dt
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.dt
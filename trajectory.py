@@ -0,0 +1,189 @@
+"""
+A preview of where the player ship is heading, under the planets' gravity.
+
+Integrating the whole preview every frame would cost more than the simulation itself,
+so the predicted path is cached. As time passes, points the ship has already passed
+are dropped, and only the tail is extended, by a few steps per frame. The path is
+only recomputed from scratch if the thrusters change, or the ship has drifted too far
+from it (e.g. after a bounce, or while turning with the thrusters on).
+"""
+
+import numpy as np
+from pygame import Color
+from pygame.math import Vector2
+from camera import Camera
+from physics import leapfrog, substep_counts, segment_disk_toi
+from config import (
+    TRAJECTORY_HORIZON,
+    TRAJECTORY_STEP,
+    TRAJECTORY_TOLERANCE,
+    TRAJECTORY_STEPS_PER_FRAME,
+    SUBSTEP_ACCURACY,
+    MAX_SUBSTEPS,
+)
+from profiler import profiler
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from universe import Universe
+
+TRAJECTORY_COLOR = Color(120, 120, 120)
+IMPACT_COLOR = Color("red")
+IMPACT_MARKER_SIZE = 8  # in pixels
+
+
+class TrajectoryPredictor:
+    """
+    The path of the player ship over the next `horizon` seconds, assuming its
+    thrusters stay as they are. Call `advance` after every Universe.step, and `draw`
+    every frame. The Universe creates one when it's first drawn.
+    """
+
+    def __init__(
+        self,
+        universe: "Universe",
+        horizon: float = TRAJECTORY_HORIZON,
+        step: float = TRAJECTORY_STEP,
+        tolerance: float = TRAJECTORY_TOLERANCE,
+        steps_per_frame: int = TRAJECTORY_STEPS_PER_FRAME,
+    ):
+        """
+        Args:
+            step (float): Time between two predicted points, in seconds.
+            tolerance (float): How far (in worldspace-units) the ship may be off the
+            predicted path before it's recomputed.
+            steps_per_frame (int): How many steps `draw` integrates at most.
+        """
+        self.universe = universe
+        self.horizon = horizon
+        self.step = step
+        self.tolerance = tolerance
+        self.steps_per_frame = steps_per_frame
+        # Planets never move
+        self.planet_pos = np.array([(p.pos.x, p.pos.y) for p in universe.planets])
+        self.planet_pos = self.planet_pos.reshape(-1, 2)
+        self.planet_radius = np.array([p.radius for p in universe.planets])
+
+        self.time = 0.0
+        # Predicted positions and velocities, `step` seconds apart, from start_time on
+        self.points = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
+        self.start_time = 0.0
+        self.impact: Vector2 | None = None  # Where the path hits a planet, if it does
+        self._thrusters: tuple[bool, bool] | None = None
+        self._thrust = np.zeros(2)
+
+    def _get_thrusters(self) -> tuple[bool, bool]:
+        ship = self.universe.player_ship
+        return (
+            ship.fuel > 0 and ship.thruster_forward,
+            ship.fuel > 0 and ship.thruster_backward,
+        )
+
+    def reset(self):
+        """Starts a new path from the ship's current state."""
+        profiler.count("trajectory resets")
+        ship = self.universe.player_ship
+        self.points = np.array([[ship.pos.x, ship.pos.y]])
+        self.velocities = np.array([[ship.vel.x, ship.vel.y]])
+        self.start_time = self.time
+        self.impact = None
+
+        self._thrusters = self._get_thrusters()
+        forward, backward = self._thrusters
+        thrust = ship.get_faced_direction() * (ship.thrust / ship.mass)
+        self._thrust = np.array(thrust) * (int(forward) - int(backward))
+
+    def predicted_pos(self, time: float) -> Vector2 | None:
+        """Returns the predicted position at `time`, or None if it isn't known."""
+        index = (time - self.start_time) / self.step
+        i = int(index)
+        if not 0 <= i < len(self.points) - 1:
+            return None
+        fraction = index - i
+        return Vector2(
+            ((1 - fraction) * self.points[i] + fraction * self.points[i + 1]).tolist()
+        )
+
+    def advance(self, dt: float):
+        """Follows the ship `dt` seconds into the future, and checks it's on the path."""
+        self.time += dt
+        if self._get_thrusters() != self._thrusters:
+            self.reset()
+            return
+        predicted = self.predicted_pos(self.time)
+        if (
+            predicted is None
+            or predicted.distance_to(self.universe.player_ship.pos) > self.tolerance
+        ):
+            self.reset()
+            return
+
+        # Forget what the ship has passed already
+        passed = int((self.time - self.start_time) / self.step)
+        if passed > 0:
+            self.points = self.points[passed:]
+            self.velocities = self.velocities[passed:]
+            self.start_time += passed * self.step
+
+    def _acceleration_at(self, points: np.ndarray) -> np.ndarray:
+        return self.universe.planet_acceleration(points) + self._thrust
+
+    def extend(self, max_steps: int):
+        """Integrates up to `max_steps` more points, until the horizon or an impact."""
+        if self._thrusters is None:
+            self.reset()
+        if self.impact is not None:
+            return
+        steps = min(max_steps, round(self.horizon / self.step) + 1 - len(self.points))
+        if steps <= 0:
+            return
+
+        universe = self.universe
+        pos, vel = self.points[-1:].copy(), self.velocities[-1:].copy()
+        new_points = np.empty((steps, 2))
+        new_velocities = np.empty((steps, 2))
+        for i in range(steps):
+            acceleration = self._acceleration_at(pos)
+            substeps = substep_counts(
+                self.step,
+                acceleration,
+                universe.nearest_planet_distance(pos),
+                SUBSTEP_ACCURACY,
+                MAX_SUBSTEPS,
+            )
+            leapfrog(pos, vel, self.step, self._acceleration_at, acceleration, substeps)
+            new_points[i], new_velocities[i] = pos[0], vel[0]
+        profiler.count("trajectory steps", steps)
+
+        # Test all new segments against all planets at once
+        starts = np.concatenate([self.points[-1:], new_points[:-1]])
+        planet_count = len(self.planet_radius)
+        toi = segment_disk_toi(
+            np.repeat(starts, planet_count, axis=0),
+            np.repeat(new_points, planet_count, axis=0),
+            np.tile(self.planet_pos, (steps, 1)),
+            np.tile(self.planet_radius, steps) + universe.player_ship.radius,
+        ).reshape(steps, planet_count)
+        first_toi = toi.min(axis=1, initial=np.inf)
+        hitting = np.flatnonzero(np.isfinite(first_toi))
+        if len(hitting) > 0:
+            i = hitting[0]
+            impact = starts[i] + first_toi[i] * (new_points[i] - starts[i])
+            self.impact = Vector2(impact.tolist())
+            new_points[i] = impact
+            new_points, new_velocities = new_points[: i + 1], new_velocities[: i + 1]
+
+        self.points = np.concatenate([self.points, new_points])
+        self.velocities = np.concatenate([self.velocities, new_velocities])
+
+    def draw(self, camera: Camera):
+        self.extend(self.steps_per_frame)
+        ship_pos = self.universe.player_ship.pos
+        # Start at the ship (which might be interpolated), then skip the passed point
+        camera.draw_polyline(
+            TRAJECTORY_COLOR,
+            np.concatenate([[[ship_pos.x, ship_pos.y]], self.points[1:]]),
+        )
+        if self.impact is not None:
+            camera.draw_marker(IMPACT_COLOR, self.impact, IMPACT_MARKER_SIZE)
@@ -1,11 +1,53 @@
 import math
+import random
+from contextlib import contextmanager
+import numpy as np
 import pygame
 import pygame.camera
 from pygame import Color
 from pygame.math import Vector2
-from physics import Disk, PhysicalObject
+from physics import (
+    Disk,
+    PhysicalObject,
+    BarnesHutTree,
+    INTEGRATORS,
+    substep_counts,
+    leapfrog,
+    disk_disk_toi,
+)
+from body_arrays import BodyArrays, gravitational_acceleration
+from gravity_field import GravityField
+from spatial_hash import DiskGrid
+from collisions import find_projectile_hits
+from raycast import (
+    RayHits,
+    cast_rays,
+    NOTHING,
+    PLANET,
+    ASTEROID,
+    ENEMY_SHIP,
+    PLAYER_SHIP,
+    ALL_KINDS,
+)
+from projectiles import ProjectilePool
+from profiler import profiler
+from hud import Hud
+from background import Background
+from minimap import Minimap
+from trajectory import TrajectoryPredictor
+from swarm import EnemySwarm
+from sectors import SectorLod
+from sprites import planet_sprites
 from ship import Ship, BulletEnemy
 from camera import Camera
+from config import (
+    BARNES_HUT_THETA,
+    INTEGRATOR,
+    SUBSTEP_ACCURACY,
+    MAX_SUBSTEPS,
+)
+
+ASTEROID_COLOR = Color("gray")
 
 
 class Planet(Disk):
@@ -22,7 +64,10 @@ class Planet(Disk):
 
 
 class Asteroid(Disk):
-    """A gray disk that doesn't exert gravitational force."""
+    """
+    A gray disk. It only exerts gravitational force (on asteroids and ships) if its
+    Universe has mutual_gravity.
+    """
 
     def __init__(
         self,
@@ -31,7 +76,8 @@ class Asteroid(Disk):
         density: float,
         radius: float,
     ):
-        super().__init__(pos, vel, density, radius, Color("gray"))
+        # Copying is much faster than looking up the color's name
+        super().__init__(pos, vel, density, radius, Color(ASTEROID_COLOR))
 
     # TODO: Re-implement that the Asteroids stopped at the world-border.
     # Or should they wrap instead? Should *all* PhysicalObjects wrap?
@@ -113,7 +159,41 @@ class Universe:
         player_ship: Ship,
         areas: list[Area],
         enemy_ships: list[BulletEnemy],
+        array_physics: bool = False,
+        seed: int | None = None,
+        gravity_field: bool = False,
+        mutual_gravity: bool = False,
+        integrator: str = INTEGRATOR,
+        sector_lod: bool = False,
+        headless: bool = False,
     ):
+        """
+        Args:
+            array_physics (bool): If True, ships and asteroids are stored in a BodyArrays,
+            and gravity and integration are computed for all of them at once. The
+            enemies' AI is then also run for all of them at once, by an EnemySwarm.
+            gravity_field (bool): If True, gravity is interpolated from a precomputed
+            GravityField, instead of summed over all planets.
+            mutual_gravity (bool): If True, ships and asteroids also attract each other,
+            computed with a BarnesHutTree (see `barnes_hut_theta`).
+            integrator (str): One of physics.INTEGRATORS. "leapfrog" substeps bodies
+            close to planets, so it stays stable with much larger `dt`. It needs
+            `array_physics`.
+            sector_lod (bool): If True, bodies far from the player are simulated less
+            often and more coarsely, see SectorLod. It needs `array_physics`.
+            headless (bool): If True, nothing needed only for drawing (the Hud,
+            Background and Minimap) is created, and the Universe can't be drawn.
+            seed (int | None): Seed for all randomness during the simulation. If None, a
+            random seed is picked (and stored in `self.seed`).
+        """
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Unknown integrator {integrator!r}")
+        if integrator == "leapfrog" and not array_physics:
+            raise ValueError("The leapfrog integrator needs array_physics")
+        if sector_lod and not array_physics:
+            raise ValueError("sector_lod needs array_physics")
+        self.integrator = integrator
+
         self.size = size
         self.planets = planets
         self.asteroids = asteroids
@@ -121,6 +201,66 @@ class Universe:
         self.areas = areas
         self.enemy_ships = enemy_ships
 
+        if seed is None:
+            seed = random.randrange(2**64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        for enemy_ship in enemy_ships:
+            enemy_ship.rng = self.rng
+            enemy_ship.line_of_sight = self.line_of_sight
+
+        # Planets are stationary, so their arrays never change
+        self._planet_pos = np.array([(p.pos.x, p.pos.y) for p in planets])
+        self._planet_pos = self._planet_pos.reshape(-1, 2)
+        self._planet_mass = np.array([p.mass for p in planets])
+        self._planet_radius = np.array([p.radius for p in planets])
+        self.gravity_field: GravityField | None = None
+        if gravity_field:
+            self.gravity_field = GravityField.load_or_build(
+                self._planet_pos, self._planet_mass, self._planet_radius, size
+            )
+        self.mutual_gravity = mutual_gravity
+        self.barnes_hut_theta = BARNES_HUT_THETA
+
+        # Broadphase for bounces and projectiles, rebuilt every step
+        self.disk_grid = DiskGrid()
+        self.enemy_grid = DiskGrid()
+        # For raycasts, rebuilt for every large batch of rays
+        self.ray_grid = DiskGrid()
+
+        self.headless = headless
+        if not headless:
+            self.hud = Hud()
+            self.background = Background()
+            self.minimap = Minimap(self)
+        # Whether the HUD lists the profiler's averages while it is enabled
+        self.show_profiler = True
+        # Only created once the Universe is drawn, since nothing else needs it
+        self.trajectory: TrajectoryPredictor | None = None
+
+        # Every ship fires into this pool
+        self.projectiles = ProjectilePool()
+        for ship in [player_ship, *enemy_ships]:
+            self.projectiles.attach(ship)
+
+        self.body_arrays: BodyArrays | None = None
+        self.swarm: EnemySwarm | None = None
+        self.lod: SectorLod | None = None
+        if array_physics:
+            self.body_arrays = BodyArrays()
+            self.body_arrays.add_many([player_ship, *enemy_ships, *asteroids])
+            self.swarm = EnemySwarm(
+                self.body_arrays,
+                self.projectiles,
+                player_ship,
+                self.rng.getrandbits(64),
+                self.line_of_sight,
+            )
+            for enemy_ship in enemy_ships:
+                self.swarm.add(enemy_ship)
+            if sector_lod:
+                self.lod = SectorLod(self.body_arrays, self.planet_acceleration)
+
     def apply_gravity_to_obj(self, dt: float, pobj: PhysicalObject):
         force_sum = Vector2(0, 0)
         for body in self.planets:
@@ -128,126 +268,485 @@ class Universe:
         pobj.apply_force(force_sum, dt)
 
     def apply_gravity(self, dt: float):
+        if self.mutual_gravity:
+            self.apply_mutual_gravity(dt)
+        if self.integrator == "leapfrog":
+            return  # The planets' gravity was part of integrating
+        if self.lod is not None:
+            # Only bodies moving during this tick, by as much time as they move
+            arrays, rows = self.body_arrays, self.lod.rows
+            arrays.vel[rows] += self.lod.step_dt[:, None] * self.planet_acceleration(
+                arrays.pos[rows]
+            )
+            return
+        if self.gravity_field is not None:
+            self.apply_gravity_from_field(dt)
+            return
+        if self.body_arrays is not None:
+            self.body_arrays.apply_gravity(self._planet_pos, self._planet_mass, dt)
+            return
         self.apply_gravity_to_obj(dt, self.player_ship)
         for enemy_ship in self.enemy_ships:
             self.apply_gravity_to_obj(dt, enemy_ship)
         for asteroid in self.asteroids:
             self.apply_gravity_to_obj(dt, asteroid)
 
-    def apply_bounce_to_disk(self, disk: Disk) -> float | None:
-        for body in self.asteroids + self.planets:
-            bounce = disk.bounce_off_of_disk(body)
-            if bounce is not None:
-                return bounce
-        return None
+    def apply_gravity_from_field(self, dt: float):
+        if self.body_arrays is not None:
+            arrays = self.body_arrays
+            arrays.vel[: arrays.count] += dt * self.gravity_field.acceleration(
+                arrays.pos[: arrays.count]
+            )
+            return
+        pobjs = [self.player_ship, *self.enemy_ships, *self.asteroids]
+        accelerations = self.gravity_field.acceleration(self.positions(pobjs))
+        for pobj, acceleration in zip(pobjs, accelerations.tolist()):
+            pobj.apply_force(pobj.mass * Vector2(acceleration), dt)
+
+    def apply_mutual_gravity(self, dt: float):
+        if self.body_arrays is not None:
+            arrays, n = self.body_arrays, self.body_arrays.count
+            tree = BarnesHutTree(arrays.pos[:n], arrays.mass[:n])
+            acceleration = tree.acceleration(self.barnes_hut_theta)
+            if self.lod is None:
+                arrays.vel[:n] += dt * acceleration
+            else:
+                rows = self.lod.rows
+                arrays.vel[rows] += self.lod.step_dt[:, None] * acceleration[rows]
+            return
+        pobjs = [self.player_ship, *self.enemy_ships, *self.asteroids]
+        tree = BarnesHutTree(
+            self.positions(pobjs), np.array([pobj.mass for pobj in pobjs])
+        )
+        accelerations = tree.acceleration(self.barnes_hut_theta)
+        for pobj, acceleration in zip(pobjs, accelerations.tolist()):
+            pobj.apply_force(pobj.mass * Vector2(acceleration), dt)
+
+    def planet_acceleration(self, points: np.ndarray) -> np.ndarray:
+        """Returns the acceleration at every point (shape (n, 2)) due to the planets."""
+        if self.gravity_field is not None:
+            return self.gravity_field.acceleration(points)
+        return gravitational_acceleration(points, self._planet_pos, self._planet_mass)
+
+    def nearest_planet_distance(self, points: np.ndarray) -> np.ndarray:
+        """Returns the distance of every point (shape (n, 2)) to its nearest planet."""
+        if len(self.planets) == 0:
+            return np.full(len(points), np.inf)
+        # Separate coordinates are much faster than (n, k, 2)-arrays
+        dx = self._planet_pos[None, :, 0] - points[:, 0, None]
+        dy = self._planet_pos[None, :, 1] - points[:, 1, None]
+        return np.sqrt((dx * dx + dy * dy).min(axis=1))
+
+    def integrate_leapfrog(self, dt: float):
+        """Moves all bodies and applies the planets' gravity, see `physics.leapfrog`."""
+        arrays, n = self.body_arrays, self.body_arrays.count
+        arrays.apply_forces(dt)
+        if self.lod is None:
+            self.leapfrog_rows(arrays.pos[:n], arrays.vel[:n], dt)
+            return
+        # Bodies behind by the same time are integrated together
+        step_dt = self.lod.step_dt
+        for group_dt in np.unique(step_dt).tolist():
+            rows = self.lod.rows[step_dt == group_dt]
+            pos, vel = arrays.pos[rows], arrays.vel[rows]
+            self.leapfrog_rows(pos, vel, group_dt)
+            arrays.pos[rows], arrays.vel[rows] = pos, vel
+
+    def leapfrog_rows(self, pos: np.ndarray, vel: np.ndarray, dt: float):
+        """Advances `pos` and `vel` (shape (n, 2)) by `dt` in place, substepping."""
+        acceleration = self.planet_acceleration(pos)
+        substeps = substep_counts(
+            dt,
+            acceleration,
+            self.nearest_planet_distance(pos),
+            SUBSTEP_ACCURACY,
+            MAX_SUBSTEPS,
+        )
+        profiler.count("leapfrog substeps", int(substeps.sum()))
+        leapfrog(pos, vel, dt, self.planet_acceleration, acceleration, substeps)
+
+    def build_disk_grid(self):
+        """Builds `self.disk_grid` over the asteroids (in order), then the planets."""
+        self.disk_grid.build(
+            np.concatenate([self.positions(self.asteroids), self._planet_pos]),
+            np.concatenate(
+                [[asteroid.radius for asteroid in self.asteroids], self._planet_radius]
+            ),
+            np.concatenate([self.previous_positions(self.asteroids), self._planet_pos]),
+        )
+
+    def find_bounces(
+        self, movers: list[Disk], planets_only: bool = False
+    ) -> list[tuple[Disk, list[tuple[Disk, float]]]]:
+        """
+        Returns every mover that touched some asteroid or planet during the last step,
+        with all of those disks and when it touched them (see `disk_disk_toi`),
+        earliest first. Requires `self.disk_grid` to be up to date.
+
+        Args:
+            planets_only (bool): If True, asteroids are ignored.
+        """
+        if not movers:
+            return []
+        prev_pos, pos = self.previous_positions(movers), self.positions(movers)
+        radius = np.array([mover.radius for mover in movers])
+        mover_indices, disk_indices = self.disk_grid.candidate_box_pairs(
+            np.minimum(prev_pos, pos) - radius[:, None],
+            np.maximum(prev_pos, pos) + radius[:, None],
+        )
+        if planets_only:
+            # The grid holds the asteroids first, then the planets
+            planet_pairs = disk_indices >= len(self.asteroids)
+            mover_indices = mover_indices[planet_pairs]
+            disk_indices = disk_indices[planet_pairs]
+        profiler.count("bounce candidates", len(mover_indices))
+        grid = self.disk_grid
+        toi = disk_disk_toi(
+            prev_pos[mover_indices],
+            pos[mover_indices],
+            radius[mover_indices],
+            grid.disk_prev_pos[disk_indices],
+            grid.disk_pos[disk_indices],
+            grid.disk_radius[disk_indices],
+        )
+        disks = [*self.asteroids, *self.planets]
+        touching = np.isfinite(toi)
+        # Pairs are sorted by disk, so a stable sort by time keeps ties in that order
+        order = np.lexsort((toi[touching], mover_indices[touching]))
+        bounces: dict[int, list[tuple[Disk, float]]] = {}
+        for i, j, t in zip(
+            mover_indices[touching][order].tolist(),
+            disk_indices[touching][order].tolist(),
+            toi[touching][order].tolist(),
+        ):
+            if movers[i] is not disks[j]:
+                bounces.setdefault(i, []).append((disks[j], t))
+        return [(movers[i], hits) for i, hits in bounces.items()]
+
+    def bounce_swept(self, disk: Disk, body: Disk, toi: float) -> float | None:
+        """
+        Like `disk.bounce_off_of_disk(body)`, but also if `disk` passed through `body`
+        within the last step, `toi` of the way into it: then it's moved back to where
+        they touched first.
+        """
+        if toi > 0 and not disk.intersects_disk(body):
+            prev_pos, body_prev_pos = disk.prev_pos, body.prev_pos
+            offset = prev_pos + toi * (disk.pos - prev_pos)
+            offset -= body_prev_pos + toi * (body.pos - body_prev_pos)
+            # Just inside, so that bounce_off_of_disk resolves the contact
+            offset.scale_to_length((disk.radius + body.radius) * (1 - 1e-9))
+            disk.pos = body.pos + offset
+        return disk.bounce_off_of_disk(body)
 
     def apply_bounce(self):
-        ship_bounce = self.apply_bounce_to_disk(self.player_ship)
-        if ship_bounce is not None:
-            # TODO: Reimplement ship glowing red on impact
-            # TODO: Adjust this to taste.
-            # Also, should we really cast a sqrt here?
-            # Check the bounce_off_of_disk method please,
-            # I don't understand its code, but it decides
-            # what value to return for the impact-intensity,
-            # i.e. the bounce-variable.
-            damage = math.sqrt(ship_bounce) / 500
-            self.player_ship.health -= damage
-        for enemy_ship in self.enemy_ships:
-            self.apply_bounce_to_disk(enemy_ship)
-        for asteroid in self.asteroids:
+        self.build_disk_grid()
+        if self.lod is None:
+            self.bounce_ships([self.player_ship, *self.enemy_ships])
+            self.bounce_asteroids(self.asteroids)
+            return
+        # Near the player, everything collides. Distant bodies only bounce off
+        # planets, and only during ticks they moved in.
+        objects = self.body_arrays.objects
+        for rows, planets_only in [
+            (self.lod.active_rows(), False),
+            (self.lod.distant_rows(), True),
+        ]:
+            movers = [objects[row] for row in rows.tolist()]
+            ships = [mover for mover in movers if isinstance(mover, Ship)]
+            asteroids = [mover for mover in movers if isinstance(mover, Asteroid)]
+            self.bounce_ships(ships, planets_only)
+            self.bounce_asteroids(asteroids, planets_only)
+
+    def bounce_ships(self, ships: list[Ship], planets_only: bool = False):
+        for ship, hits in self.find_bounces(ships, planets_only):
+            # Ships only bounce off the first disk they hit
+            for body, toi in hits:
+                bounce = self.bounce_swept(ship, body, toi)
+                if bounce is None:
+                    continue
+                if ship is self.player_ship:
+                    # TODO: Reimplement ship glowing red on impact
+                    # TODO: Adjust this to taste.
+                    # Also, should we really cast a sqrt here?
+                    # Check the bounce_off_of_disk method please,
+                    # I don't understand its code, but it decides
+                    # what value to return for the impact-intensity,
+                    # i.e. the bounce-variable.
+                    damage = math.sqrt(bounce) / 500
+                    self.player_ship.health -= damage
+                break
+
+    def bounce_asteroids(self, asteroids: list[Asteroid], planets_only: bool = False):
+        for asteroid, hits in self.find_bounces(asteroids, planets_only):
             # TODO: This is an *asymmetric* interaction.
             # If two asteroids collide, only one of them will bounce,
             # because when the second tries to bounce, the two will already
             # have been separated from one another
-            other_asteroids = list(filter(lambda ast: ast != asteroid, self.asteroids))
-            for disk in other_asteroids + self.planets:
-                asteroid.bounce_off_of_disk(disk)
+            for body, toi in hits:
+                self.bounce_swept(asteroid, body, toi)
+
+    def add_enemy_ship(self, ship: BulletEnemy):
+        self.enemy_ships.append(ship)
+        ship.rng = self.rng
+        ship.line_of_sight = self.line_of_sight
+        self.projectiles.attach(ship)
+        if self.body_arrays is not None:
+            self.body_arrays.add(ship)
+        if self.swarm is not None:
+            self.swarm.add(ship)
+
+    def remove_enemy_ship(self, ship: BulletEnemy):
+        self.enemy_ships.remove(ship)
+        if self.swarm is not None:
+            self.swarm.remove(ship)
+        if ship.arrays is not None:
+            ship.arrays.remove(ship)
+
+    def raycast(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        max_distances: np.ndarray | float,
+        kinds: tuple[int, ...] = ALL_KINDS,
+    ) -> RayHits:
+        """
+        Returns what each ray hits first, out of the planets, asteroids and ships.
+        Cast as many rays as possible per call, since every call gathers all disks
+        (and rebuilds `self.ray_grid`, for large batches).
+
+        Args:
+            origins (np.ndarray): Shape (n, 2).
+            directions (np.ndarray): Shape (n, 2), need not be normalized.
+            max_distances (np.ndarray | float): Shape (n,), or one for all rays.
+            kinds (tuple[int, ...]): What can be hit, e.g. raycast.PLANET.
+        """
+        groups = {
+            PLANET: (self._planet_pos, self._planet_radius),
+            ASTEROID: (
+                self.positions(self.asteroids),
+                np.array([asteroid.radius for asteroid in self.asteroids]),
+            ),
+            ENEMY_SHIP: (
+                self.positions(self.enemy_ships),
+                np.array([ship.radius for ship in self.enemy_ships]),
+            ),
+            PLAYER_SHIP: (
+                self.positions([self.player_ship]),
+                np.array([self.player_ship.radius]),
+            ),
+        }
+        groups = {kind: groups[kind] for kind in kinds}
+        counts = [len(radius) for _, radius in groups.values()]
+        return cast_rays(
+            origins,
+            directions,
+            max_distances,
+            np.concatenate([pos for pos, _ in groups.values()]).reshape(-1, 2),
+            np.concatenate([radius for _, radius in groups.values()]),
+            np.repeat(list(groups), counts),
+            np.concatenate([np.arange(count) for count in counts]).astype(np.intp),
+            self.ray_grid,
+        )
 
-    def asteroids_or_planets_intersect_point(self, vec: Vector2):
-        return any(
-            map(lambda planet: planet.intersects_point(vec), self.planets)
-        ) or any(map(lambda asteroid: asteroid.intersects_point(vec), self.asteroids))
+    def line_of_sight(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Returns for every pair of points (shape (n, 2) each) whether no planet or
+        asteroid lies between them.
+        """
+        if len(starts) == 0:
+            return np.zeros(0, dtype=bool)
+        delta = ends - starts
+        hits = self.raycast(
+            starts, delta, np.hypot(delta[:, 0], delta[:, 1]), (PLANET, ASTEROID)
+        )
+        return hits.kind == NOTHING
+
+    def positions(self, pobjs: list[PhysicalObject]) -> np.ndarray:
+        """Returns the positions of `pobjs` as an array of shape (len(pobjs), 2)."""
+        if self.body_arrays is not None:
+            return self.body_arrays.pos[[pobj.row for pobj in pobjs]]
+        return np.array([(pobj.pos.x, pobj.pos.y) for pobj in pobjs]).reshape(-1, 2)
+
+    def velocities(self, pobjs: list[PhysicalObject]) -> np.ndarray:
+        """Like `positions`, but the velocities."""
+        if self.body_arrays is not None:
+            return self.body_arrays.vel[[pobj.row for pobj in pobjs]]
+        return np.array([(pobj.vel.x, pobj.vel.y) for pobj in pobjs]).reshape(-1, 2)
+
+    def previous_positions(self, pobjs: list[PhysicalObject]) -> np.ndarray:
+        """
+        Like `positions`, but from before the last step. Objects not stored in arrays
+        don't remember that, so their current position is returned instead.
+        """
+        if self.body_arrays is not None:
+            return self.body_arrays.prev_pos[[pobj.row for pobj in pobjs]]
+        return self.positions(pobjs)
+
+    def collide_projectiles(self):
+        """Collides all projectiles in one batch, see `find_projectile_hits`."""
+        pool = self.projectiles
+        if pool.count == 0:
+            return
+        profiler.count("projectiles collided", pool.count)
+
+        # Bounces moved some disks since the last build
+        self.build_disk_grid()
+        self.enemy_grid.build(
+            self.positions(self.enemy_ships),
+            np.array([ship.radius for ship in self.enemy_ships]),
+            self.previous_positions(self.enemy_ships),
+        )
+        hits = find_projectile_hits(
+            pool.prev_pos[: pool.count],
+            pool.pos[: pool.count],
+            pool.owner[: pool.count] == self.player_ship.owner_id,
+            self.size,
+            self.disk_grid,
+            self.enemy_grid,
+            self.player_ship.prev_pos,
+            self.player_ship.pos,
+            self.player_ship.radius,
+        )
 
-    def step(self, dt: float):
-        # Call `step` on everything
-        self.player_ship.step(dt)
-        for ship in self.enemy_ships:
-            ship.step(dt)
-        for asteroid in self.asteroids:
-            asteroid.step(dt)
+        pool.remove(hits.removed)
+        self.player_ship.health -= 10 * hits.player_hits
+        for index in reversed(hits.killed_enemies):
+            self.remove_enemy_ship(self.enemy_ships[index])
 
-        # Physics
-        self.apply_gravity(dt)
-        self.apply_bounce()
+    def step_objects(self, dt: float):
+        """Moves all ships and asteroids, remembering where they were before."""
+        self.projectiles.save_previous()
+        if self.body_arrays is not None:
+            self.body_arrays.save_previous()
 
-        # Areas
+        # Call `step` on everything
+        self.player_ship.step(dt)
+        if self.swarm is None:
+            for ship in self.enemy_ships:
+                ship.step(dt)
+        else:
+            self.swarm.step(dt)
+        if self.body_arrays is None:
+            for asteroid in self.asteroids:
+                asteroid.step(dt)
+            return
+        if self.lod is not None:
+            # After the ships thrusted, which wakes them up
+            self.lod.update(dt, self.player_ship.pos)
+        if self.integrator == "leapfrog":
+            self.integrate_leapfrog(dt)
+        elif self.lod is not None:
+            arrays, rows = self.body_arrays, self.lod.rows
+            arrays.apply_forces(dt)
+            arrays.pos[rows] += self.lod.step_dt[:, None] * arrays.vel[rows]
+        else:
+            # Ships have only accumulated their thrust, so move everything now
+            self.body_arrays.integrate(dt)
+
+    def apply_areas(self):
         for area in self.areas:
             if area.intersects_point(self.player_ship.pos):
                 area.event(self.player_ship)
 
-        # Collide bullets:
-        for projectile in self.player_ship.projectiles:
-            if self.asteroids_or_planets_intersect_point(
-                projectile.pos
-            ) or not self.contains_point(projectile.pos):
-                self.player_ship.projectiles.remove(projectile)
-                continue
-            for ship in self.enemy_ships:
-                if ship.intersects_point(projectile.pos):
-                    self.enemy_ships.remove(ship)
-                    self.player_ship.projectiles.remove(projectile)
-                    break
-        for ship in self.enemy_ships:
-            for projectile in ship.projectiles:
-                if self.asteroids_or_planets_intersect_point(
-                    projectile.pos
-                ) or not self.contains_point(projectile.pos):
-                    ship.projectiles.remove(projectile)
-                    continue
-                if self.player_ship.intersects_point(projectile.pos):
-                    self.player_ship.health -= 10
-                    ship.projectiles.remove(projectile)
-                    continue
-
-    def draw(self, camera: Camera):
-        for area in self.areas:
-            area.draw(camera)
-        for asteroid in self.asteroids:
-            asteroid.draw(camera)
-        for planet in self.planets:
-            planet.draw(camera)
-        for ship in self.enemy_ships:
-            ship.draw(camera)
-        self.player_ship.draw(camera)
-        self.draw_text(camera)
+    def step_projectiles(self, dt: float):
+        self.projectiles.step(dt)
+        self.collide_projectiles()
 
-    def draw_text(self, camera: Camera):
-        font_size = 32
-        font = pygame.font.Font(None, font_size)
+    def step(self, dt: float):
+        with profiler.scope("step/objects"):
+            self.step_objects(dt)
 
-        self.text_vertical_offset = 10
+        # Physics
+        with profiler.scope("step/gravity"):
+            self.apply_gravity(dt)
+        with profiler.scope("step/bounce"):
+            self.apply_bounce()
+
+        with profiler.scope("step/areas"):
+            self.apply_areas()
+        with profiler.scope("step/projectiles"):
+            self.step_projectiles(dt)
+        if self.trajectory is not None:
+            with profiler.scope("step/trajectory"):
+                self.trajectory.advance(dt)
+
+    @contextmanager
+    def interpolated(self, alpha: float):
+        """
+        Within this context, everything stored in arrays sits `alpha` of the way
+        between its position before and after the last step.
+        Used to render in between two fixed-timestep ticks.
+        """
+        stores = [self.projectiles]
+        if self.body_arrays is not None:
+            stores.append(self.body_arrays)
+        saved = [store.interpolate(alpha) for store in stores]
+        try:
+            yield
+        finally:
+            for store, current in zip(stores, saved):
+                store.restore_positions(current)
 
-        def texty(text: str | None = None):
-            if text is not None:
-                camera.draw_text(
-                    text, Vector2(10, self.text_vertical_offset), font, Color("white")
-                )
-            self.text_vertical_offset += 1.0 * font_size
+    def draw(self, camera: Camera):
+        if self.headless:
+            raise ValueError("A headless Universe can't be drawn")
+        with profiler.scope("draw/background"):
+            self.background.draw(camera)
+        with profiler.scope("draw/areas"):
+            for area in self.areas:
+                area.draw(camera)
+        with profiler.scope("draw/asteroids"):
+            camera.draw_circles(
+                [asteroid.color for asteroid in self.asteroids],
+                self.positions(self.asteroids),
+                np.array([asteroid.radius for asteroid in self.asteroids]),
+            )
+        with profiler.scope("draw/planets"):
+            visible = camera.visible_circles(self._planet_pos, self._planet_radius)
+            for i in visible.tolist():
+                planet = self.planets[i]
+                planet_sprites.draw(camera, planet.color, planet.pos, planet.radius)
+        with profiler.scope("draw/trajectory"):
+            if self.trajectory is None:
+                self.trajectory = TrajectoryPredictor(self)
+            self.trajectory.draw(camera)
+        with profiler.scope("draw/ships"):
+            if self.swarm is not None:
+                self.swarm.sync()
+            for ship in self.enemy_ships:
+                ship.draw(camera)
+            self.player_ship.draw(camera)
+        with profiler.scope("draw/projectiles"):
+            self.projectiles.draw(camera)
+        with profiler.scope("draw/text"):
+            self.draw_text(camera)
+        with profiler.scope("draw/minimap"):
+            self.minimap.draw(camera)
 
+    def draw_text(self, camera: Camera):
         ship = self.player_ship
-        texty(f"({int(ship.pos.x)}, {int(ship.pos.y)})")
-        texty(f"Remaining Fuel: {ship.fuel:.3f}")
-        texty(f"Trophy: {"Collected" if ship.has_trophy else "Not collected"}")
-        texty(f"Health: {ship.health}")
-        texty(f"Ammunition: {ship.ammo}")
+        lines: list[str | None] = []
+        lines.append(f"({int(ship.pos.x)}, {int(ship.pos.y)})")
+        lines.append(f"Remaining Fuel: {ship.fuel:.3f}")
+        lines.append(f"Trophy: {"Collected" if ship.has_trophy else "Not collected"}")
+        lines.append(f"Health: {ship.health}")
+        lines.append(f"Ammunition: {ship.ammo}")
         for area in self.areas:
             f"  Coordinates of {area.caption}: ({area.top_left.x}, {area.top_left.y})"
-        texty(f"{len(ship.projectiles)} projectiles from you")
-        enemy_projectile_count = sum([len(e.projectiles) for e in self.enemy_ships])
-        texty(f"{enemy_projectile_count} enemy projectiles")
-
-        del self.text_vertical_offset
+        own_projectile_count = self.projectiles.count_owned_by(ship.owner_id)
+        lines.append(f"{own_projectile_count} projectiles from you")
+        enemy_projectile_count = self.projectiles.count - own_projectile_count
+        lines.append(f"{enemy_projectile_count} enemy projectiles")
+
+        if profiler.enabled and self.show_profiler:
+            lines.append(None)
+            for name, value in profiler.get_averages().items():
+                if "/" in name:
+                    lines.append(f"{name}: {value:.2f} ms")
+                else:
+                    lines.append(f"{name}: {value:.0f}")
+
+        self.hud.draw(camera, lines)
 
     def contains_point(self, vec: Vector2):
         return 0 <= vec.x <= self.size.x and 0 <= vec.y <= self.size.y
@@ -0,0 +1,413 @@
+"""
+Many Universes as one vectorised environment, for reinforcement learning.
+
+VecEnv steps `num_envs` independent Universes in lockstep, spread over a pool of
+worker processes. Actions, observations, rewards and done-flags live in shared memory,
+so a step only sends a single byte to every worker and waits for one back; nothing is
+pickled.
+
+An action is a byte of replay input-bits (rotate left/right, thrust forward/backward,
+shoot), so an agent's actions can be recorded and replayed like a player's. It's held
+for `action_repeat` ticks.
+
+An observation is the ship's own state, the nearest planets, asteroids, enemies and
+enemy projectiles, and what rays cast all around the ship hit (see Universe.raycast).
+The Universes are headless, so they can't be drawn.
+
+Example:
+    py vec_env.py --envs 64 --workers 8 --steps 500
+"""
+
+import argparse
+import math
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import time
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from config import TICK_RATE, WORLD_WIDTH, WORLD_HEIGHT
+from replay import apply_input_bits
+from raycast import PLANET, ASTEROID, ENEMY_SHIP
+from scenario import build_universe
+from universe import Universe
+
+ACTION_COUNT = 32  # Every combination of the five input-bits
+
+# An observation is the ship's own state, then the nearest entities, then ray sensors
+SHIP_FEATURES = 9
+NEARBY_ENTITIES = 8
+# Relative position and velocity, radius, and a one-hot kind
+ENTITY_KINDS = ["planet", "asteroid", "enemy ship", "enemy projectile"]
+ENTITY_FEATURES = 5 + len(ENTITY_KINDS)
+# Then what rays cast all around the ship (starting straight ahead) hit first: the
+# distance (1 if nothing), and a one-hot kind
+RAY_COUNT = 16
+RAY_RANGE = 1500
+RAY_KINDS = (PLANET, ASTEROID, ENEMY_SHIP)
+RAY_FEATURES = 1 + len(RAY_KINDS)
+OBSERVATION_SIZE = (
+    SHIP_FEATURES + NEARBY_ENTITIES * ENTITY_FEATURES + RAY_COUNT * RAY_FEATURES
+)
+
+# Observed distances and speeds are divided by these, to be roughly within [-1, 1]
+DISTANCE_SCALE = 1000
+SPEED_SCALE = 500
+
+KILL_REWARD = 1.0
+DAMAGE_PENALTY = 0.01  # Per point of health lost
+GAME_OVER_PENALTY = 10.0
+
+# Commands sent to workers, and their answer
+_STEP = b"s"
+_RESET = b"r"
+_CLOSE = b"c"
+_READY = b"k"
+
+
+class UniverseEnv:
+    """A single Universe (the default map) as an environment. Used by VecEnv."""
+
+    def __init__(
+        self,
+        seed: int,
+        asteroid_count: int = 5,
+        enemy_count: int = 4,
+        action_repeat: int = 4,
+        max_steps: int = 2000,
+        dt: float = 1 / TICK_RATE,
+    ):
+        """
+        Args:
+            seed (int): Seeds the Universes of all episodes.
+            max_steps (int): Episodes end after this many steps, at the latest.
+        """
+        self.rng = random.Random(seed)
+        self.asteroid_count = asteroid_count
+        self.enemy_count = enemy_count
+        self.action_repeat = action_repeat
+        self.max_steps = max_steps
+        self.dt = dt
+        self.reset()
+
+    def reset(self):
+        self.universe: Universe = build_universe(
+            asteroid_count=self.asteroid_count,
+            enemy_count=self.enemy_count,
+            seed=self.rng.getrandbits(64),
+            headless=True,
+        )
+        self.steps = 0
+        self.initial_health = self.universe.player_ship.health
+        self.initial_ammo = self.universe.player_ship.ammo
+        # Planets never move
+        self.planet_pos = self.universe.positions(self.universe.planets)
+        self.planet_radius = np.array([p.radius for p in self.universe.planets])
+
+    def is_game_over(self) -> bool:
+        ship = self.universe.player_ship
+        return not self.universe.contains_point(ship.pos) or ship.health <= 0
+
+    def step(self, action: int) -> tuple[float, bool]:
+        """Holds `action` for `action_repeat` ticks. Returns the reward, and if done."""
+        universe, ship = self.universe, self.universe.player_ship
+        enemies_before, health_before = len(universe.enemy_ships), ship.health
+        game_over = False
+        for _ in range(self.action_repeat):
+            # Like the main loop: shooting is an input applied before every tick
+            apply_input_bits(ship, action)
+            universe.step(self.dt)
+            game_over = self.is_game_over()
+            if game_over:
+                break
+        self.steps += 1
+
+        reward = KILL_REWARD * (enemies_before - len(universe.enemy_ships))
+        reward -= DAMAGE_PENALTY * max(0.0, health_before - ship.health)
+        if game_over:
+            reward -= GAME_OVER_PENALTY
+        return reward, game_over or self.steps >= self.max_steps
+
+    def observe(self, out: np.ndarray):
+        """Writes the observation (shape (OBSERVATION_SIZE,)) into `out`."""
+        universe, ship = self.universe, self.universe.player_ship
+        pos, vel = ship.pos, ship.vel
+        angle = math.radians(ship.angle)
+        out[:SHIP_FEATURES] = (
+            pos.x / WORLD_WIDTH,
+            pos.y / WORLD_HEIGHT,
+            vel.x / SPEED_SCALE,
+            vel.y / SPEED_SCALE,
+            math.cos(angle),
+            math.sin(angle),
+            ship.fuel / ship.MAX_FUEL,
+            ship.health / self.initial_health,
+            ship.ammo / self.initial_ammo,
+        )
+
+        pool = universe.projectiles
+        enemy_projectiles = np.flatnonzero(pool.owner[: pool.count] != ship.owner_id)
+        groups = [
+            (self.planet_pos, np.zeros_like(self.planet_pos), self.planet_radius),
+            (
+                universe.positions(universe.asteroids),
+                universe.velocities(universe.asteroids),
+                np.array([asteroid.radius for asteroid in universe.asteroids]),
+            ),
+            (
+                universe.positions(universe.enemy_ships),
+                universe.velocities(universe.enemy_ships),
+                np.array([enemy.radius for enemy in universe.enemy_ships]),
+            ),
+            (
+                pool.pos[enemy_projectiles],
+                pool.vel[enemy_projectiles],
+                np.zeros(len(enemy_projectiles)),
+            ),
+        ]
+        kinds = np.repeat(np.arange(len(groups)), [len(g[2]) for g in groups])
+        rel_pos = np.concatenate([g[0] for g in groups]) - (pos.x, pos.y)
+        rel_vel = np.concatenate([g[1] for g in groups]) - (vel.x, vel.y)
+        radius = np.concatenate([g[2] for g in groups])
+
+        # The nearest by distance to their surface, nearest first
+        distance = np.hypot(rel_pos[:, 0], rel_pos[:, 1]) - radius
+        k = min(NEARBY_ENTITIES, len(distance))
+        nearest = np.argpartition(distance, k - 1)[:k] if k > 0 else []
+        nearest = nearest[np.argsort(distance[nearest])]
+
+        entities_end = SHIP_FEATURES + NEARBY_ENTITIES * ENTITY_FEATURES
+        entities = out[SHIP_FEATURES:entities_end].reshape(
+            NEARBY_ENTITIES, ENTITY_FEATURES
+        )
+        entities[:] = 0
+        entities[:k, 0:2] = rel_pos[nearest] / DISTANCE_SCALE
+        entities[:k, 2:4] = rel_vel[nearest] / SPEED_SCALE
+        entities[:k, 4] = radius[nearest] / DISTANCE_SCALE
+        entities[np.arange(k), 5 + kinds[nearest]] = 1
+
+        ray_angles = angle + np.linspace(0, 2 * np.pi, RAY_COUNT, endpoint=False)
+        hits = universe.raycast(
+            np.broadcast_to([pos.x, pos.y], (RAY_COUNT, 2)),
+            np.stack([np.cos(ray_angles), np.sin(ray_angles)], axis=1),
+            RAY_RANGE,
+            RAY_KINDS,
+        )
+        rays = out[entities_end:].reshape(RAY_COUNT, RAY_FEATURES)
+        rays[:] = 0
+        hit = np.flatnonzero(hits.index >= 0)
+        rays[:, 0] = 1
+        rays[hit, 0] = hits.distance[hit] / RAY_RANGE
+        rays[hit, 1 + np.searchsorted(RAY_KINDS, hits.kind[hit])] = 1
+
+
+class _SharedBuffers:
+    """The arrays VecEnv shares with its workers, each in its own SharedMemory."""
+
+    # name: (shape after num_envs, dtype)
+    LAYOUT = {
+        "actions": ((), np.uint8),
+        "observations": ((OBSERVATION_SIZE,), np.float32),
+        "rewards": ((), np.float32),
+        "dones": ((), np.bool_),
+    }
+
+    def __init__(self, num_envs: int, names: dict[str, str] | None = None):
+        """Creates new shared memory, or attaches to existing memory if `names` is set."""
+        self.memories: dict[str, SharedMemory] = {}
+        for name, (shape, dtype) in self.LAYOUT.items():
+            shape = (num_envs, *shape)
+            if names is None:
+                size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+                memory = SharedMemory(create=True, size=size)
+            else:
+                memory = SharedMemory(names[name])
+            self.memories[name] = memory
+            setattr(self, name, np.ndarray(shape, dtype, buffer=memory.buf))
+
+    def names(self) -> dict[str, str]:
+        return {name: memory.name for name, memory in self.memories.items()}
+
+    def close(self, unlink: bool = False):
+        for name in self.LAYOUT:
+            delattr(self, name)  # Arrays must be gone before their memory is closed
+        for memory in self.memories.values():
+            memory.close()
+            if unlink:
+                memory.unlink()
+
+
+def _step_envs(
+    envs: list[UniverseEnv], buffers: _SharedBuffers, start: int, reset: bool
+):
+    """Steps (or resets) `envs`, which are environments `start`, `start + 1`, ..."""
+    for i, env in enumerate(envs, start):
+        if reset:
+            env.reset()
+            buffers.rewards[i], buffers.dones[i] = 0, False
+        else:
+            reward, done = env.step(int(buffers.actions[i]))
+            buffers.rewards[i], buffers.dones[i] = reward, done
+            if done:
+                env.reset()
+        env.observe(buffers.observations[i])
+
+
+def _worker(
+    connection: multiprocessing.connection.Connection,
+    buffer_names: dict[str, str],
+    num_envs: int,
+    start: int,
+    seeds: list[int],
+    env_kwargs: dict,
+):
+    buffers = _SharedBuffers(num_envs, buffer_names)
+    envs = [UniverseEnv(seed, **env_kwargs) for seed in seeds]
+    connection.send_bytes(_READY)
+    try:
+        while (command := connection.recv_bytes()) != _CLOSE:
+            _step_envs(envs, buffers, start, reset=command == _RESET)
+            connection.send_bytes(_READY)
+    finally:
+        buffers.close()
+
+
+class VecEnv:
+    """
+    `num_envs` UniverseEnvs, stepped in lockstep by `num_workers` processes.
+
+    `reset` and `step` return the shared arrays themselves, which the next call
+    overwrites. An environment that is done is reset right away, so the observation
+    returned along with `done` is the first one of its next episode.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_workers: int | None = None,
+        seed: int = 0,
+        **env_kwargs,
+    ):
+        """
+        Args:
+            num_workers (int | None): Defaults to one per CPU. With 0, all
+            environments are stepped in this process.
+            env_kwargs: Passed on to every UniverseEnv.
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = min(num_workers, num_envs)
+        self.num_envs = num_envs
+        self.buffers = _SharedBuffers(num_envs)
+        # Independent streams of seeds, one per environment
+        seeds = [
+            int(sequence.generate_state(1, np.uint64)[0])
+            for sequence in np.random.SeedSequence(seed).spawn(num_envs)
+        ]
+
+        self.envs: list[UniverseEnv] = []
+        self.connections: list[multiprocessing.connection.Connection] = []
+        self.processes: list[multiprocessing.Process] = []
+        if num_workers == 0:
+            self.envs = [UniverseEnv(seed, **env_kwargs) for seed in seeds]
+            rows_per_worker = []
+        else:
+            rows_per_worker = np.array_split(np.arange(num_envs), num_workers)
+        for rows in rows_per_worker:
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker,
+                args=(
+                    worker_connection,
+                    self.buffers.names(),
+                    num_envs,
+                    int(rows[0]),
+                    [seeds[i] for i in rows],
+                    env_kwargs,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self._wait()
+
+    def _wait(self):
+        for connection in self.connections:
+            connection.recv_bytes()
+
+    def _run(self, command: bytes):
+        if not self.connections:
+            _step_envs(self.envs, self.buffers, 0, reset=command == _RESET)
+            return
+        for connection in self.connections:
+            connection.send_bytes(command)
+        self._wait()
+
+    def reset(self) -> np.ndarray:
+        """Starts a new episode everywhere. Returns the observations."""
+        self._run(_RESET)
+        return self.buffers.observations
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Args:
+            actions (np.ndarray): Shape (num_envs,), input-bits below ACTION_COUNT.
+
+        Returns:
+            The observations (shape (num_envs, OBSERVATION_SIZE)), rewards and dones.
+        """
+        self.buffers.actions[:] = actions
+        self._run(_STEP)
+        return self.buffers.observations, self.buffers.rewards, self.buffers.dones
+
+    def close(self):
+        for connection in self.connections:
+            connection.send_bytes(_CLOSE)
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = [], []
+        self.buffers.close(unlink=True)
+
+    def __enter__(self) -> "VecEnv":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--action-repeat", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with VecEnv(
+        args.envs, args.workers, args.seed, action_repeat=args.action_repeat
+    ) as env:
+        env.reset()
+        start = time.perf_counter()
+        total_reward = 0.0
+        episodes = 0
+        for _ in range(args.steps):
+            actions = rng.integers(0, ACTION_COUNT, args.envs)
+            _, rewards, dones = env.step(actions)
+            total_reward += float(rewards.sum())
+            episodes += int(dones.sum())
+        elapsed = time.perf_counter() - start
+
+    steps = args.steps * args.envs
+    print(
+        f"{steps / elapsed:.0f} env steps per second"
+        f" ({steps * args.action_repeat / elapsed:.0f} ticks per second),"
+        f" {episodes} episodes done, mean reward {total_reward / steps:.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()